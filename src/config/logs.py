@@ -1,7 +1,39 @@
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 
+_CONFIGURED = False
+_LISTENER = None
+
+
+def _build_handlers():
+    """Montar os handlers de console e de arquivo rotativo da aplicação"""
+    log_dir = Path(__file__).parent.parent / "logs"
+    log_dir.mkdir(exist_ok=True)
+    log_file = log_dir / "enem_api.log"
+
+    formatter = logging.Formatter(
+        fmt="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(formatter)
+
+    file_handler = RotatingFileHandler(
+        log_file,
+        maxBytes=10 * 1024 * 1024,
+        backupCount=5,
+        encoding="utf-8",
+    )
+    file_handler.setLevel(logging.INFO)
+    file_handler.setFormatter(formatter)
+
+    return console_handler, file_handler
+
 
 def setup_logger():
     """
@@ -13,6 +45,8 @@ def setup_logger():
     - Rotação automática quando arquivo atinge 10MB
     - Mantém backup de até 5 arquivos antigos
     - Formato padronizado com timestamp, nível, nome e mensagem
+    - Escrita feita em thread separada (QueueHandler + QueueListener),
+      sem bloquear o event loop
 
     Args:
         None
@@ -24,37 +58,56 @@ def setup_logger():
         O diretório de logs é criado automaticamente se não existir.
         O logger é configurado apenas uma vez (singleton pattern).
     """
-
-    log_dir = Path(__file__).parent.parent / "logs"
-    log_dir.mkdir(exist_ok=True)
-    log_file = log_dir / "enem_api.log"
-
-    formatter = logging.Formatter(
-        fmt="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
+    global _CONFIGURED, _LISTENER
 
     logger = logging.getLogger("enem_api")
-    logger.setLevel(logging.INFO)
 
-    if logger.handlers:
+    if _CONFIGURED or logger.handlers:
         return logger
 
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    logger.setLevel(logging.INFO)
 
-    file_handler = RotatingFileHandler(
-        log_file,
-        maxBytes=10 * 1024 * 1024,
-        backupCount=5,
-        encoding="utf-8",
+    console_handler, file_handler = _build_handlers()
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(
+        log_queue, console_handler, file_handler, respect_handler_level=True
     )
-    file_handler.setLevel(logging.INFO)
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    listener.start()
+    atexit.register(listener.stop)
+    _LISTENER = listener
+
+    logger.addHandler(QueueHandler(log_queue))
+
+    _CONFIGURED = True
+    return logger
+
+
+def setup_worker_logger():
+    """
+    Reconfigura o logger para escrita direta, sem fila, em processos auxiliares.
+
+    Processos do pool de carga encerram sem executar os handlers de atexit:
+    registros ainda na fila do QueueListener seriam perdidos ao final.
+
+    Args:
+        None
+
+    Returns:
+        logging.Logger: Logger com os handlers de console e arquivo anexados diretamente
+    """
+    global _LISTENER
+
+    logger = setup_logger()
+    if _LISTENER is not None:
+        atexit.unregister(_LISTENER.stop)
+        _LISTENER.stop()
+        _LISTENER = None
 
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    for handler in _build_handlers():
+        logger.addHandler(handler)
     return logger
 
 
@@ -17,6 +17,19 @@ class Settings(BaseSettings):
 
     MONGO_URL: str
     DATABASE_NAME: str
+    MONGO_MAX_POOL_SIZE: int = 200
+    MONGO_MIN_POOL_SIZE: int = 10
+    MONGO_COMPRESSORS: str = "zstd,zlib"
+    MONGO_ZLIB_COMPRESSION_LEVEL: int = 3
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 3000
+    MONGO_BATCH_SIZE: int = 2000
+    MONGO_QUERY_MAX_TIME_MS: int = 30000
+    ESCOLA_STATS_REFRESH_SECONDS: int = 24 * 60 * 60
+    UF_STATS_REFRESH_SECONDS: int = 60 * 60
+    DISTRIBUICAO_REDACAO_REFRESH_SECONDS: int = 60 * 60
+    MEDIAS_AREA_REFRESH_SECONDS: int = 60 * 60
+    PARTICIPANTES_SUMMARY_REFRESH_SECONDS: int = 24 * 60 * 60
+    VIEWS_REFRESH_DEBOUNCE_SECONDS: int = 30
 
 
 settings = Settings()
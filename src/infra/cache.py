@@ -0,0 +1,86 @@
+import asyncio
+import functools
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Tuple
+
+
+class TTLCache:
+    """
+    Cache em memória com expiração por tempo (TTL) e tamanho máximo (LRU).
+
+    Pensado para valores lidos com frequência e que mudam pouco, como
+    documentos buscados por código. Os repositories são criados a cada
+    requisição, então a instância do cache deve ficar no nível da classe
+    ou do módulo.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Retornar (encontrado, valor) para a chave informada"""
+        item = self._data.get(key)
+        if item is None:
+            return False, None
+
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return False, None
+
+        self._data.move_to_end(key)
+        return True, value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Armazenar valor, descartando o menos usado se passar do limite"""
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Remover uma chave do cache"""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Esvaziar o cache"""
+        self._data.clear()
+
+
+def async_ttl_cache(ttl: float = 300.0, maxsize: int = 64) -> Callable:
+    """
+    Memorizar o resultado de um método assíncrono por um tempo (TTL).
+
+    A chave é formada pelos argumentos, sem o self, já que os repositories são
+    recriados a cada requisição. O cache guarda a própria Future, então chamadas
+    simultâneas com os mesmos argumentos compartilham uma única execução.
+    Execuções com erro não ficam no cache. O método decorado ganha um
+    cache_clear() para invalidação.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            encontrado, future = cache.get(key)
+            if not encontrado:
+                future = asyncio.ensure_future(func(self, *args, **kwargs))
+                cache.set(key, future)
+
+                def descartar_falha(done: asyncio.Future) -> None:
+                    if done.cancelled() or done.exception() is not None:
+                        cache.invalidate(key)
+
+                future.add_done_callback(descartar_falha)
+            # shield: o cancelamento de um chamador não cancela os demais
+            return await asyncio.shield(future)
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator
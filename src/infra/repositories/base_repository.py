@@ -1,33 +1,182 @@
+import asyncio
+import contextlib
 from abc import ABC
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, FrozenSet, List, Optional, Set, Tuple
 
 from bson import ObjectId
+from bson.errors import InvalidId
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel, ReadPreference
+from pymongo.errors import OperationFailure
+from pymongo.read_concern import ReadConcern
 
+from config.logs import logger
+from config.settings import settings
 from models.base import MongoBaseModel
 
 
+def _id_filter(id: str) -> Dict[str, Any]:
+    """Montar filtro por _id que aceita tanto ObjectId quanto string"""
+    try:
+        object_id = ObjectId(id)
+    except (InvalidId, TypeError):
+        return {"_id": id}
+    return {"_id": {"$in": [object_id, id]}}
+
+
+def analytics_view(collection):
+    """Visão da coleção para agregações só de leitura, que toleram dados defasados"""
+    return collection.with_options(
+        read_preference=ReadPreference.SECONDARY_PREFERRED,
+        read_concern=ReadConcern("available"),
+    )
+
+
+async def prefetch_batches(
+    cursor, batch_size: int = 1000, depth: int = 2
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Iterar sobre os lotes do cursor buscando os próximos enquanto o atual é consumido"""
+    queue: asyncio.Queue = asyncio.Queue(maxsize=depth)
+    fim = object()
+
+    async def producer() -> None:
+        try:
+            while True:
+                batch = await cursor.to_list(length=batch_size)
+                if not batch:
+                    break
+                await queue.put(batch)
+            await queue.put(fim)
+        except Exception as e:
+            await queue.put(e)
+
+    task = asyncio.create_task(producer())
+    try:
+        while True:
+            batch = await queue.get()
+            if batch is fim:
+                break
+            if isinstance(batch, Exception):
+                raise batch
+            yield batch
+    finally:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+        # Consumidor que parou antes do fim (ex.: cliente desconectou no meio do
+        # stream): sem isto o cursor fica aberto no servidor até expirar
+        await cursor.close()
+
+
+async def prefetch_iter(
+    cursor, batch_size: int = 1000, depth: int = 2
+) -> AsyncIterator[Dict[str, Any]]:
+    """Iterar documento a documento sobre os lotes pré-carregados do cursor"""
+    async for batch in prefetch_batches(cursor, batch_size, depth):
+        for document in batch:
+            yield document
+
+
+# Atualização das visões após escritas, por classe de repository: uma tarefa
+# por vez, e as escritas feitas enquanto ela roda pedem mais uma rodada
+# Índices confirmados por ensure_indexes nesta execução, por coleção (ver _hint)
+_indices_prontos: Dict[str, FrozenSet[str]] = {}
+
+_refresh_tarefas: Dict[type, "asyncio.Task[None]"] = {}
+_refresh_pendente: Set[type] = set()
+
+
 class BaseRepository(ABC):
+    indexes: List[IndexModel] = []
+    # Documentos por lote retornados pelo cursor (reduz idas e vindas de getMore)
+    batch_size: int = settings.MONGO_BATCH_SIZE
+    # Teto de documentos materializados por agregação sem $limit
+    max_aggregate_results: int = 10_000
+
     def __init__(self, database: AsyncIOMotorDatabase, collection_name: str):
         self.database = database
         self.collection = database[collection_name]
+        # Estatísticas vão para um secundário quando houver réplica (no-op em nó único)
+        self.analytics_collection = analytics_view(self.collection)
+
+    async def ensure_indexes(self) -> None:
+        """Criar os índices declarados pelo repository"""
+        if not self.indexes:
+            return
+        await self._drop_non_unique_predecessors()
+        try:
+            await self.collection.create_indexes(self.indexes)
+            prontos = {index.document["name"] for index in self.indexes}
+        except OperationFailure as e:
+            # Um índice com problema (p.ex. duplicatas sob um índice único) não
+            # impede a criação dos demais
+            logger.error(f"Erro ao criar os índices de {self.collection.name}: {e}")
+            prontos = set()
+            for index in self.indexes:
+                try:
+                    await self.collection.create_indexes([index])
+                    prontos.add(index.document["name"])
+                except OperationFailure as erro:
+                    logger.error(f"Índice {index.document['name']} não criado: {erro}")
+        _indices_prontos[self.collection.name] = frozenset(prontos)
+
+    def _hint(self, keys: List[Tuple[str, int]], colecao: Optional[str] = None) -> Dict[str, Any]:
+        """Opção hint para o índice, só se ensure_indexes conseguiu criá-lo"""
+        # Sem o índice, o hint faria a consulta falhar: o planner escolhe sozinho
+        prontos = _indices_prontos.get(colecao or self.collection.name, frozenset())
+        if IndexModel(keys).document["name"] in prontos:
+            return {"hint": keys}
+        return {}
+
+    async def _drop_non_unique_predecessors(self) -> None:
+        """Remover índices antigos não únicos com o mesmo nome de um índice único declarado"""
+        # Bancos carregados antes dos índices únicos têm, p.ex., um codigo_1 comum:
+        # mesmo nome e chave, opções diferentes, e o createIndexes falharia inteiro
+        existentes = await self.collection.index_information()
+        for index in self.indexes:
+            spec = index.document
+            atual = existentes.get(spec["name"])
+            if spec.get("unique") and atual is not None and not atual.get("unique"):
+                logger.info(
+                    f"Substituindo o índice {spec['name']} de {self.collection.name} "
+                    "pela versão única"
+                )
+                await self.collection.drop_index(spec["name"])
+
+    async def refresh_views(self) -> None:
+        """Recalcular as visões materializadas do repository (nenhuma por padrão)"""
+
+    def schedule_views_refresh(self) -> None:
+        """Agendar refresh_views após uma escrita, agrupando as escritas próximas"""
+        repository_type = type(self)
+        _refresh_pendente.add(repository_type)
+        tarefa = _refresh_tarefas.get(repository_type)
+        if tarefa is None or tarefa.done():
+            _refresh_tarefas[repository_type] = asyncio.create_task(
+                self._refresh_views_adiado()
+            )
+
+    async def _refresh_views_adiado(self) -> None:
+        """Esperar a janela de agrupamento e recalcular as visões enquanto houver escritas"""
+        repository_type = type(self)
+        while repository_type in _refresh_pendente:
+            await asyncio.sleep(settings.VIEWS_REFRESH_DEBOUNCE_SECONDS)
+            _refresh_pendente.discard(repository_type)
+            try:
+                await self.refresh_views()
+            except Exception as e:
+                logger.error(f"Erro ao atualizar visões após escrita: {e}")
 
     async def create(self, document: MongoBaseModel) -> MongoBaseModel:
         """Criar um novo documento"""
-        document_dict = document.dict(by_alias=True)
+        document_dict = document.model_dump(by_alias=True, exclude_none=True)
         result = await self.collection.insert_one(document_dict)
         document.id = result.inserted_id
         return document
 
     async def find_by_id(self, id: str) -> Optional[Dict[str, Any]]:
         """Buscar documento por ID"""
-        if ObjectId.is_valid(id):
-            result = await self.collection.find_one({"_id": ObjectId(id)})
-            if result:
-                return result
-        
-        result = await self.collection.find_one({"_id": id})
-        return result
+        return await self.collection.find_one(_id_filter(id))
 
     async def find_all(
         self,
@@ -36,17 +185,97 @@ class BaseRepository(ABC):
         filter_dict: Optional[Dict[str, Any]] = None,
         sort_by: Optional[str] = None,
         sort_order: int = 1,
+        projection: Optional[Dict[str, Any]] = None,
     ) -> List[Dict[str, Any]]:
         """Buscar todos os documentos com paginação"""
         filter_dict = filter_dict or {}
-        cursor = self.collection.find(filter_dict)
+        cursor = self.collection.find(filter_dict, projection)
 
         if sort_by:
             cursor = cursor.sort(sort_by, sort_order)
 
-        cursor = cursor.skip(skip).limit(limit)
+        # Lote do tamanho da página: tudo volta na primeira resposta, sem getMore
+        cursor = cursor.skip(skip).limit(limit).batch_size(limit)
         return await cursor.to_list(length=limit)
 
+    async def find_page(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        filter_dict: Optional[Dict[str, Any]] = None,
+        sort_by: Optional[str] = None,
+        sort_order: int = 1,
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Buscar uma página de documentos e o total em uma única agregação ($facet)"""
+        items_pipeline: List[Dict[str, Any]] = []
+        if sort_by:
+            items_pipeline.append({"$sort": {sort_by: sort_order}})
+        items_pipeline.append({"$skip": skip})
+        if limit > 0:
+            items_pipeline.append({"$limit": limit})
+        if projection:
+            items_pipeline.append({"$project": projection})
+
+        pipeline = [
+            {"$match": filter_dict or {}},
+            {"$facet": {"items": items_pipeline, "total": [{"$count": "n"}]}},
+        ]
+        # Listagem lê do primário: um documento recém-criado já aparece na página
+        cursor = self.collection.aggregate(pipeline, batchSize=self.batch_size)
+        result = await cursor.to_list(length=1)
+        page = result[0] if result else {}
+        total = page.get("total") or [{"n": 0}]
+        return page.get("items", []), total[0]["n"]
+
+    def _cursor(
+        self,
+        filter_dict: Optional[Dict[str, Any]],
+        projection: Optional[Dict[str, Any]],
+        batch_size: int,
+        max_time_ms: Optional[int] = None,
+    ):
+        """Abrir um cursor de busca com tamanho de lote explícito"""
+        # Sem batch_size o servidor manda 101 documentos e depois lotes de até
+        # 16 MiB; um lote fixo custa mais getMore, mas limita a memória por lote
+        cursor = self.collection.find(filter_dict or {}, projection).batch_size(
+            batch_size
+        )
+        if max_time_ms:
+            cursor = cursor.max_time_ms(max_time_ms)
+        return cursor
+
+    async def iter_find(
+        self,
+        filter_dict: Optional[Dict[str, Any]] = None,
+        projection: Optional[Dict[str, Any]] = None,
+        batch_size: Optional[int] = None,
+        max_time_ms: Optional[int] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Iterar sobre os documentos sem carregar o resultado inteiro em memória"""
+        batch_size = batch_size or self.batch_size
+        cursor = self._cursor(filter_dict, projection, batch_size, max_time_ms)
+        async for document in prefetch_iter(cursor, batch_size):
+            yield document
+
+    async def iter_raw_batches(
+        self,
+        filter_dict: Optional[Dict[str, Any]] = None,
+        projection: Optional[Dict[str, Any]] = None,
+        batch_size: Optional[int] = None,
+    ) -> AsyncIterator[bytes]:
+        """Iterar sobre lotes de BSON bruto (documentos concatenados), sem decodificá-los"""
+        filter_dict = filter_dict or {}
+        batch_size = batch_size or self.batch_size
+        cursor = self.collection.find_raw_batches(filter_dict, projection).batch_size(
+            batch_size
+        )
+        try:
+            async for batch in cursor:
+                yield batch
+        finally:
+            await cursor.close()
+
     async def count(self, filter_dict: Optional[Dict[str, Any]] = None) -> int:
         """Contar documentos"""
         filter_dict = filter_dict or {}
@@ -54,36 +283,29 @@ class BaseRepository(ABC):
 
     async def update_by_id(self, id: str, update_dict: Dict[str, Any]) -> bool:
         """Atualizar documento por ID"""
-        # Tentar primeiro como ObjectId
-        if ObjectId.is_valid(id):
-            result = await self.collection.update_one(
-                {"_id": ObjectId(id)}, {"$set": update_dict}
-            )
-            if result.modified_count > 0:
-                return True
-        
-        # Se não atualizou, tentar como string
+        # updated_at vem do relógio do servidor, sem datetime montado no cliente
         result = await self.collection.update_one(
-            {"_id": id}, {"$set": update_dict}
+            _id_filter(id),
+            {"$set": update_dict, "$currentDate": {"updated_at": True}},
         )
         return result.modified_count > 0
 
     async def delete_by_id(self, id: str) -> bool:
         """Deletar documento por ID"""
-        # Tentar primeiro como ObjectId
-        if ObjectId.is_valid(id):
-            result = await self.collection.delete_one({"_id": ObjectId(id)})
-            if result.deleted_count > 0:
-                return True
-        
-        # Se não deletou, tentar como string
-        result = await self.collection.delete_one({"_id": id})
+        result = await self.collection.delete_one(_id_filter(id))
         return result.deleted_count > 0
 
-    async def aggregate(self, pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Executar pipeline de agregação"""
-        cursor = self.collection.aggregate(pipeline)
-        return await cursor.to_list(length=None)
+    async def aggregate(
+        self,
+        pipeline: List[Dict[str, Any]],
+        length: Optional[int] = None,
+        **options: Any,
+    ) -> List[Dict[str, Any]]:
+        """Executar pipeline de agregação estatística (só leitura)"""
+        cursor = self.analytics_collection.aggregate(
+            pipeline, batchSize=self.batch_size, **options
+        )
+        return await cursor.to_list(length=length or self.max_aggregate_results)
 
     # Aliases para compatibilidade
     async def update(self, id: str, update_dict: Dict[str, Any]) -> bool:
@@ -1,24 +1,76 @@
 from typing import Optional, List, Dict, Any
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from .base_repository import BaseRepository
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from infra.cache import TTLCache
+
+from .base_repository import BaseRepository, analytics_view
+from .resultado_repository import ESCOLA_NOTAS_INDEX
 
 
 class EscolaRepository(BaseRepository):
+    indexes = [
+        IndexModel([("codigo", ASCENDING)], unique=True),
+        IndexModel([("municipio_codigo", ASCENDING)]),
+        IndexModel([("uf_sigla", ASCENDING)]),
+        IndexModel([("total_participantes", DESCENDING)]),
+    ]
+
+    # Visão materializada com as estatísticas por escola (ver refresh_escola_stats)
+    stats_collection_name = "escola_stats"
+
+    # Compartilhado entre instâncias: o repository é criado a cada requisição
+    _codigo_cache = TTLCache(maxsize=10_000, ttl=300)
+
     def __init__(self, database: AsyncIOMotorDatabase):
         super().__init__(database, "escolas")
+        self.stats_collection = database[self.stats_collection_name]
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Esvaziar o cache de escolas por código"""
+        cls._codigo_cache.clear()
 
     async def find_by_codigo(self, codigo: int) -> Optional[Dict[str, Any]]:
         """Buscar escola por código"""
-        return await self.collection.find_one({"codigo": codigo})
+        encontrado, escola = self._codigo_cache.get(codigo)
+        if encontrado:
+            return dict(escola)
+
+        escola = await self.collection.find_one({"codigo": codigo})
+        if escola:
+            self._codigo_cache.set(codigo, escola)
+            return dict(escola)
+        return escola
+
+    async def update_by_id(self, id: str, update_dict: Dict[str, Any]) -> bool:
+        """Atualizar escola por ID e invalidar o cache de códigos"""
+        updated = await super().update_by_id(id, update_dict)
+        if updated:
+            self._codigo_cache.clear()
+        return updated
 
-    async def find_by_municipio(self, municipio_codigo: int) -> List[Dict[str, Any]]:
+    async def delete_by_id(self, id: str) -> bool:
+        """Deletar escola por ID e invalidar o cache de códigos"""
+        deleted = await super().delete_by_id(id)
+        if deleted:
+            self._codigo_cache.clear()
+        return deleted
+
+    async def find_by_municipio(
+        self, municipio_codigo: int, projection: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
         """Buscar escolas por município"""
-        cursor = self.collection.find({"municipio_codigo": municipio_codigo})
+        cursor = self._cursor(
+            {"municipio_codigo": municipio_codigo}, projection, self.batch_size
+        )
         return await cursor.to_list(length=None)
 
-    async def find_by_uf(self, uf_sigla: str) -> List[Dict[str, Any]]:
+    async def find_by_uf(
+        self, uf_sigla: str, projection: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
         """Buscar escolas por UF"""
-        cursor = self.collection.find({"uf_sigla": uf_sigla})
+        cursor = self._cursor({"uf_sigla": uf_sigla}, projection, self.batch_size)
         return await cursor.to_list(length=None)
 
     async def get_estatisticas_por_dependencia(
@@ -59,33 +111,37 @@ class EscolaRepository(BaseRepository):
             self.collection.find({"total_participantes": {"$gt": 0}})
             .sort("total_participantes", -1)
             .limit(limit)
+            .batch_size(limit)
         )
         return await cursor.to_list(length=limit)
 
     async def get_ranking_por_desempenho(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Obter ranking das escolas por desempenho médio dos participantes"""
+        # Agrega primeiro em resultados e só busca as escolas do ranking final
         pipeline = [
+            {"$match": {"escola_codigo": {"$ne": None}}},
             {
-                "$lookup": {
-                    "from": "resultados",
-                    "localField": "codigo",
-                    "foreignField": "escola_codigo",
-                    "as": "resultados",
+                "$group": {
+                    "_id": "$escola_codigo",
+                    "media_cn": {"$avg": "$nota_cn"},
+                    "media_ch": {"$avg": "$nota_ch"},
+                    "media_lc": {"$avg": "$nota_lc"},
+                    "media_mt": {"$avg": "$nota_mt"},
+                    "media_redacao": {"$avg": "$nota_redacao"},
+                    "total_participantes_com_nota": {"$sum": 1},
                 }
             },
-            {"$match": {"resultados": {"$ne": []}}},
             {
                 "$addFields": {
                     "media_geral": {
                         "$avg": [
-                            {"$avg": "$resultados.nota_cn"},
-                            {"$avg": "$resultados.nota_ch"},
-                            {"$avg": "$resultados.nota_lc"},
-                            {"$avg": "$resultados.nota_mt"},
-                            {"$avg": "$resultados.nota_redacao"},
+                            "$media_cn",
+                            "$media_ch",
+                            "$media_lc",
+                            "$media_mt",
+                            "$media_redacao",
                         ]
-                    },
-                    "total_participantes_com_nota": {"$size": "$resultados"},
+                    }
                 }
             },
             {
@@ -94,22 +150,49 @@ class EscolaRepository(BaseRepository):
                     "total_participantes_com_nota": {"$gte": 5},
                 }
             },
+            {"$sort": {"media_geral": -1}},
+            {"$limit": limit},
             {
-                "$project": {
-                    "codigo": 1,
-                    "nome": 1,
-                    "municipio_codigo": 1,
-                    "uf_sigla": 1,
-                    "dependencia_administrativa": 1,
-                    "situacao_funcionamento": 1,
-                    "media_geral": 1,
-                    "total_participantes_com_nota": 1,
+                "$lookup": {
+                    "from": "escolas",
+                    "let": {"escola_codigo": "$_id"},
+                    "pipeline": [
+                        {"$match": {"$expr": {"$eq": ["$codigo", "$$escola_codigo"]}}},
+                        {
+                            "$project": {
+                                "codigo": 1,
+                                "nome": 1,
+                                "municipio_codigo": 1,
+                                "uf_sigla": 1,
+                                "dependencia_administrativa": 1,
+                                "situacao_funcionamento": 1,
+                            }
+                        },
+                    ],
+                    "as": "escola",
+                }
+            },
+            {"$unwind": "$escola"},
+            {
+                "$replaceRoot": {
+                    "newRoot": {
+                        "$mergeObjects": [
+                            "$escola",
+                            {
+                                "media_geral": "$media_geral",
+                                "total_participantes_com_nota": "$total_participantes_com_nota",
+                            },
+                        ]
+                    }
                 }
             },
-            {"$sort": {"media_geral": -1}},
-            {"$limit": limit},
         ]
-        return await self.aggregate(pipeline)
+        # Hint no índice de cobertura: o $group lê só o índice, sem buscar documentos;
+        # sem allowDiskUse, uma regressão no plano falha em vez de ficar lenta
+        cursor = analytics_view(self.database["resultados"]).aggregate(
+            pipeline, **self._hint(ESCOLA_NOTAS_INDEX, "resultados"), allowDiskUse=False, batchSize=limit
+        )
+        return await cursor.to_list(length=limit)
 
     async def get_escolas_por_uf(self) -> List[Dict[str, Any]]:
         """Obter contagem de escolas por UF"""
@@ -144,23 +227,28 @@ class EscolaRepository(BaseRepository):
         pipeline = [
             {"$match": {"codigo": codigo}},
             {
+                # Agrega os resultados dentro do $lookup: retorna um único documento
                 "$lookup": {
                     "from": "resultados",
-                    "localField": "codigo",
-                    "foreignField": "escola_codigo",
-                    "as": "resultados",
-                }
-            },
-            {
-                "$addFields": {
-                    "total_resultados": {"$size": "$resultados"},
-                    "media_cn": {"$avg": "$resultados.nota_cn"},
-                    "media_ch": {"$avg": "$resultados.nota_ch"},
-                    "media_lc": {"$avg": "$resultados.nota_lc"},
-                    "media_mt": {"$avg": "$resultados.nota_mt"},
-                    "media_redacao": {"$avg": "$resultados.nota_redacao"},
+                    "let": {"escola_codigo": "$codigo"},
+                    "pipeline": [
+                        {"$match": {"$expr": {"$eq": ["$escola_codigo", "$$escola_codigo"]}}},
+                        {
+                            "$group": {
+                                "_id": None,
+                                "total_resultados": {"$sum": 1},
+                                "media_cn": {"$avg": "$nota_cn"},
+                                "media_ch": {"$avg": "$nota_ch"},
+                                "media_lc": {"$avg": "$nota_lc"},
+                                "media_mt": {"$avg": "$nota_mt"},
+                                "media_redacao": {"$avg": "$nota_redacao"},
+                            }
+                        },
+                    ],
+                    "as": "estatisticas",
                 }
             },
+            {"$unwind": {"path": "$estatisticas", "preserveNullAndEmptyArrays": True}},
             {
                 "$project": {
                     "codigo": 1,
@@ -169,16 +257,131 @@ class EscolaRepository(BaseRepository):
                     "uf_sigla": 1,
                     "dependencia_administrativa": 1,
                     "total_participantes": 1,
-                    "total_resultados": 1,
+                    "total_resultados": {
+                        "$ifNull": ["$estatisticas.total_resultados", 0]
+                    },
                     "medias": {
-                        "ciencias_natureza": "$media_cn",
-                        "ciencias_humanas": "$media_ch",
-                        "linguagens_codigos": "$media_lc",
-                        "matematica": "$media_mt",
-                        "redacao": "$media_redacao",
+                        "ciencias_natureza": {"$ifNull": ["$estatisticas.media_cn", None]},
+                        "ciencias_humanas": {"$ifNull": ["$estatisticas.media_ch", None]},
+                        "linguagens_codigos": {"$ifNull": ["$estatisticas.media_lc", None]},
+                        "matematica": {"$ifNull": ["$estatisticas.media_mt", None]},
+                        "redacao": {"$ifNull": ["$estatisticas.media_redacao", None]},
                     },
                 }
             },
         ]
         result = await self.aggregate(pipeline)
         return result[0] if result else {}
+
+    async def refresh_escola_stats(self) -> None:
+        """Recalcular as estatísticas de todas as escolas e gravá-las via $merge"""
+        await self.stats_collection.create_index([("codigo", ASCENDING)], unique=True)
+        await self.stats_collection.create_index([("media_geral", DESCENDING)])
+
+        medias = ["$media_cn", "$media_ch", "$media_lc", "$media_mt", "$media_redacao"]
+        pipeline = [
+            {"$match": {"escola_codigo": {"$ne": None}}},
+            {
+                "$group": {
+                    "_id": "$escola_codigo",
+                    "total_resultados": {"$sum": 1},
+                    "media_cn": {"$avg": "$nota_cn"},
+                    "media_ch": {"$avg": "$nota_ch"},
+                    "media_lc": {"$avg": "$nota_lc"},
+                    "media_mt": {"$avg": "$nota_mt"},
+                    "media_redacao": {"$avg": "$nota_redacao"},
+                }
+            },
+            {
+                "$lookup": {
+                    "from": "escolas",
+                    "let": {"escola_codigo": "$_id"},
+                    "pipeline": [
+                        {"$match": {"$expr": {"$eq": ["$codigo", "$$escola_codigo"]}}},
+                        {
+                            "$project": {
+                                "codigo": 1,
+                                "nome": 1,
+                                "municipio_codigo": 1,
+                                "uf_sigla": 1,
+                                "dependencia_administrativa": 1,
+                                "situacao_funcionamento": 1,
+                                "total_participantes": 1,
+                            }
+                        },
+                    ],
+                    "as": "escola",
+                }
+            },
+            {"$unwind": "$escola"},
+            {
+                "$replaceRoot": {
+                    "newRoot": {
+                        "$mergeObjects": [
+                            "$escola",
+                            {
+                                "total_resultados": "$total_resultados",
+                                "medias": {
+                                    "ciencias_natureza": "$media_cn",
+                                    "ciencias_humanas": "$media_ch",
+                                    "linguagens_codigos": "$media_lc",
+                                    "matematica": "$media_mt",
+                                    "redacao": "$media_redacao",
+                                },
+                                "media_geral": {"$avg": medias},
+                                "atualizado_em": "$$NOW",
+                            },
+                        ]
+                    }
+                }
+            },
+            {
+                "$merge": {
+                    "into": self.stats_collection_name,
+                    "on": "codigo",
+                    "whenMatched": "replace",
+                    "whenNotMatched": "insert",
+                }
+            },
+        ]
+        # $merge não retorna documentos: basta consumir o cursor
+        await self.database["resultados"].aggregate(
+            pipeline, **self._hint(ESCOLA_NOTAS_INDEX, "resultados")
+        ).to_list(length=None)
+
+    async def get_estatisticas_escola_cached(self, codigo: int) -> Dict[str, Any]:
+        """Obter estatísticas da escola pela visão materializada, com fallback ao vivo"""
+        stats = await self.stats_collection.find_one(
+            {"codigo": codigo},
+            {"situacao_funcionamento": 0, "media_geral": 0, "atualizado_em": 0},
+        )
+        if stats:
+            return stats
+        return await self.get_estatisticas_escola(codigo)
+
+    async def get_ranking_por_desempenho_cached(
+        self, limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """Obter ranking por desempenho pela visão materializada, com fallback ao vivo"""
+        cursor = (
+            self.stats_collection.find(
+                {"media_geral": {"$ne": None}, "total_resultados": {"$gte": 5}},
+                {
+                    "codigo": 1,
+                    "nome": 1,
+                    "municipio_codigo": 1,
+                    "uf_sigla": 1,
+                    "dependencia_administrativa": 1,
+                    "situacao_funcionamento": 1,
+                    "media_geral": 1,
+                    "total_participantes_com_nota": "$total_resultados",
+                },
+            )
+            .sort("media_geral", DESCENDING)
+            .limit(limit)
+            .batch_size(limit)
+        )
+        ranking = await cursor.to_list(length=limit)
+        if ranking:
+            return ranking
+        return await self.get_ranking_por_desempenho(limit)
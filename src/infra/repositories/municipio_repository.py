@@ -1,32 +1,73 @@
 from typing import Any, Dict, List, Optional
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, IndexModel
 
 from config.logs import logger
 
+from infra.cache import TTLCache
+
 from .base_repository import BaseRepository
 
 
 class MunicipioRepository(BaseRepository):
+    indexes = [
+        IndexModel([("codigo", ASCENDING)], unique=True),
+        IndexModel([("uf_sigla", ASCENDING)]),
+        IndexModel([("regiao", ASCENDING)]),
+    ]
+
+    # Compartilhado entre instâncias: o repository é criado a cada requisição
+    _codigo_cache = TTLCache(maxsize=10_000, ttl=300)
+
     def __init__(self, database: AsyncIOMotorDatabase):
         super().__init__(database, "municipios")
 
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Esvaziar o cache de municípios por código"""
+        cls._codigo_cache.clear()
+
     async def find_by_codigo(self, codigo: int) -> Optional[Dict[str, Any]]:
         """Buscar município por código"""
-        logger.info(f"Repository: Buscando município por código {codigo}")
+        logger.debug("Repository: Buscando município por código %s", codigo)
+        encontrado, resultado = self._codigo_cache.get(codigo)
+        if encontrado:
+            return dict(resultado)
+
         resultado = await self.collection.find_one({"codigo": codigo})
         if resultado:
-            logger.info(f"Repository: Município encontrado - código {codigo}")
+            logger.debug("Repository: Município encontrado - código %s", codigo)
+            self._codigo_cache.set(codigo, resultado)
+            return dict(resultado)
         return resultado
 
-    async def find_by_uf(self, uf_sigla: str) -> List[Dict[str, Any]]:
+    async def update_by_id(self, id: str, update_dict: Dict[str, Any]) -> bool:
+        """Atualizar município por ID e invalidar o cache de códigos"""
+        updated = await super().update_by_id(id, update_dict)
+        if updated:
+            self._codigo_cache.clear()
+        return updated
+
+    async def delete_by_id(self, id: str) -> bool:
+        """Deletar município por ID e invalidar o cache de códigos"""
+        deleted = await super().delete_by_id(id)
+        if deleted:
+            self._codigo_cache.clear()
+        return deleted
+
+    async def find_by_uf(
+        self, uf_sigla: str, projection: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
         """Buscar municípios por UF"""
-        cursor = self.collection.find({"uf_sigla": uf_sigla})
+        cursor = self._cursor({"uf_sigla": uf_sigla}, projection, self.batch_size)
         return await cursor.to_list(length=None)
 
-    async def find_by_regiao(self, regiao: str) -> List[Dict[str, Any]]:
+    async def find_by_regiao(
+        self, regiao: str, projection: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
         """Buscar municípios por região"""
-        cursor = self.collection.find({"regiao": regiao})
+        cursor = self._cursor({"regiao": regiao}, projection, self.batch_size)
         return await cursor.to_list(length=None)
 
     async def get_estatisticas_por_regiao(self) -> List[Dict[str, Any]]:
@@ -1,362 +1,438 @@
-from typing import Any, Dict, List, Optional
+import asyncio
+import heapq
+from operator import itemgetter
+from typing import Any, AsyncIterator, Dict, List, Optional, TypedDict
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
-
-from .base_repository import BaseRepository
+from pymongo import ASCENDING, IndexModel
+
+from config.settings import settings
+from infra.cache import async_ttl_cache
+from models.base import MongoBaseModel
+
+from .base_repository import BaseRepository, analytics_view
+
+
+# Mapeamento de códigos para descrições legíveis
+SEXO_MAP = {"M": "Masculino", "F": "Feminino"}
+
+COR_RACA_MAP = {
+    0: "Não declarado",
+    1: "Branca",
+    2: "Preta",
+    3: "Parda",
+    4: "Amarela",
+    5: "Indígena",
+}
+
+FAIXA_ETARIA_MAP = {
+    1: "Menor que 17 anos",
+    2: "17 anos",
+    3: "18 anos",
+    4: "19 anos",
+    5: "20 anos",
+    6: "21 anos",
+    7: "22 anos",
+    8: "23 anos",
+    9: "24 anos",
+    10: "25 anos",
+    11: "Entre 26 e 30 anos",
+    12: "Entre 31 e 35 anos",
+    13: "Entre 36 e 40 anos",
+    14: "Entre 41 e 45 anos",
+    15: "Entre 46 e 50 anos",
+    16: "Entre 51 e 55 anos",
+    17: "Entre 56 e 60 anos",
+    18: "Entre 61 e 65 anos",
+    19: "Entre 66 e 70 anos",
+    20: "Maior que 70 anos",
+}
+
+
+def _switch_descricao(mapa: Dict[Any, str], padrao: Any) -> Dict[str, Any]:
+    """Montar um $switch que traduz o código do grupo para a descrição do mapa"""
+    return {
+        "$switch": {
+            "branches": [
+                {"case": {"$eq": ["$$item._id", codigo]}, "then": descricao}
+                for codigo, descricao in mapa.items()
+            ],
+            "default": padrao,
+        }
+    }
+
+
+# Descrições calculadas no servidor para cada faceta, com o mesmo texto de
+# fallback que os formatadores usavam para códigos fora dos mapas
+DESCRICAO_SEXO = _switch_descricao(SEXO_MAP, {"$ifNull": ["$$item._id", "Não informado"]})
+DESCRICAO_FAIXA_ETARIA = _switch_descricao(
+    FAIXA_ETARIA_MAP, {"$concat": ["Faixa ", {"$toString": "$$item._id"}]}
+)
+DESCRICAO_COR_RACA = _switch_descricao(
+    COR_RACA_MAP, {"$concat": ["Código ", {"$toString": "$$item._id"}]}
+)
+
+
+def _pipeline_contagem_por(
+    campo: str,
+    match: Optional[Dict[str, Any]] = None,
+    descricao: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """Montar contagem por campo com total geral e percentuais calculados no servidor"""
+    pipeline = [{"$match": match}] if match else []
+    extras = [{"descricao": descricao}] if descricao else []
+    return pipeline + [
+        {
+            "$group": {
+                "_id": f"${campo}",
+                "total": {"$sum": 1},
+                "treineiros": {"$sum": {"$toInt": "$treineiro"}},
+            }
+        },
+        {
+            "$group": {
+                "_id": None,
+                "itens": {"$push": "$$ROOT"},
+                "total_geral": {"$sum": "$total"},
+            }
+        },
+        {
+            "$project": {
+                "_id": 0,
+                "total_geral": 1,
+                "itens": {
+                    "$map": {
+                        "input": "$itens",
+                        "as": "item",
+                        "in": {
+                            "$mergeObjects": [
+                                "$$item",
+                                {
+                                    "percentual_do_total": {
+                                        "$round": [
+                                            {
+                                                "$multiply": [
+                                                    {"$divide": ["$$item.total", {"$max": ["$total_geral", 1]}]},
+                                                    100,
+                                                ]
+                                            },
+                                            2,
+                                        ]
+                                    },
+                                    "percentual_treineiros": {
+                                        "$round": [
+                                            {
+                                                "$multiply": [
+                                                    {"$divide": ["$$item.treineiros", {"$max": ["$$item.total", 1]}]},
+                                                    100,
+                                                ]
+                                            },
+                                            2,
+                                        ]
+                                    },
+                                },
+                                *extras,
+                            ]
+                        },
+                    }
+                },
+            }
+        },
+    ]
+
+
+def _por_total(itens: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Ordenar grupos pelo total, do maior para o menor"""
+    return sorted(itens, key=itemgetter("total"), reverse=True)
+
+
+class EstatisticaContagem(TypedDict):
+    """Campos de contagem compartilhados pelas linhas de cada distribuição"""
+
+    total_participantes: int
+    participantes_regulares: int
+    treineiros: int
+    percentual_do_total: float
+    percentual_treineiros: float
+
+
+def _estatisticas_contagem(item: Dict[str, Any]) -> EstatisticaContagem:
+    """Campos comuns de uma linha de contagem (totais e percentuais)"""
+    total, treineiros = item["total"], item["treineiros"]
+    # Literal em vez de EstatisticaContagem(...): evita a chamada com kwargs
+    return {
+        "total_participantes": total,
+        # treineiro é sempre booleano (False por padrão no modelo)
+        "participantes_regulares": total - treineiros,
+        "treineiros": treineiros,
+        "percentual_do_total": item["percentual_do_total"],
+        "percentual_treineiros": item["percentual_treineiros"],
+    }
+
+
+# Índice usado como hint na contagem de participantes por UF; parcial, só
+# participantes com UF preenchida entram nele
+UF_TREINEIRO_INDEX = [("uf_prova", ASCENDING), ("treineiro", ASCENDING)]
+UF_PREENCHIDA = {"uf_prova": {"$type": "string"}}
+
+# Contagem de treineiros direto no índice (COUNT_SCAN)
+TREINEIRO_INDEX = [("treineiro", ASCENDING)]
+
+
+# Todas as distribuições demográficas em uma única passada pela coleção
+FACETAS_DEMOGRAFICAS_PIPELINE = [
+    # Só os campos usados pelas facetas seguem adiante
+    {
+        "$project": {
+            "_id": 0,
+            "sexo": 1,
+            "faixa_etaria": 1,
+            "cor_raca": 1,
+            "uf_prova": 1,
+            "treineiro": 1,
+            "idade": 1,
+        }
+    },
+    {
+        "$facet": {
+            "por_sexo": _pipeline_contagem_por("sexo", descricao=DESCRICAO_SEXO),
+            "por_faixa_etaria": _pipeline_contagem_por(
+                "faixa_etaria", descricao=DESCRICAO_FAIXA_ETARIA
+            ),
+            "por_cor_raca": _pipeline_contagem_por(
+                "cor_raca", descricao=DESCRICAO_COR_RACA
+            ),
+            "por_uf": [
+                {"$match": UF_PREENCHIDA},
+                {"$sortByCount": "$uf_prova"},
+                {"$limit": 10},  # Top 10 UFs
+            ],
+            # Totais de participantes e treineiros vêm de contagens (ver _get_totais)
+            "idade": [
+                {
+                    "$group": {
+                        "_id": None,
+                        # $avg ignora idades ausentes ou nulas
+                        "idade_media": {"$avg": "$idade"},
+                    }
+                }
+            ],
+        }
+    }
+]
 
 
 class ParticipanteRepository(BaseRepository):
+    indexes = [
+        IndexModel([("nu_inscricao", ASCENDING)], unique=True),
+        IndexModel([("municipio_prova_codigo", ASCENDING)]),
+        IndexModel([("nu_ano", ASCENDING)]),
+        # Cobre a contagem por UF: o $match e o $group leem só o índice
+        IndexModel(UF_TREINEIRO_INDEX, partialFilterExpression=UF_PREENCHIDA),
+        IndexModel(TREINEIRO_INDEX),
+    ]
+
+    # Resumo materializado das facetas demográficas (ver refresh_summary)
+    summary_collection_name = "participantes_summary"
+
     def __init__(self, database: AsyncIOMotorDatabase):
         super().__init__(database, "participantes")
-
-    async def find_by_inscricao(self, nu_inscricao: str) -> Optional[Dict[str, Any]]:
+        self.summary_collection = analytics_view(database[self.summary_collection_name])
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Esvaziar o cache das estatísticas demográficas"""
+        cls._get_facetas_demograficas.cache_clear()
+        cls.get_participantes_por_uf.cache_clear()
+
+    async def refresh_views(self) -> None:
+        """Recalcular o resumo materializado dos participantes"""
+        await self.refresh_summary()
+
+    async def create(self, document: MongoBaseModel) -> MongoBaseModel:
+        """Criar participante, invalidar os caches e agendar a atualização do resumo"""
+        created = await super().create(document)
+        self.clear_cache()
+        self.schedule_views_refresh()
+        return created
+
+    async def update_by_id(self, id: str, update_dict: Dict[str, Any]) -> bool:
+        """Atualizar participante por ID, invalidar os caches e agendar a atualização do resumo"""
+        updated = await super().update_by_id(id, update_dict)
+        if updated:
+            self.clear_cache()
+            self.schedule_views_refresh()
+        return updated
+
+    async def delete_by_id(self, id: str) -> bool:
+        """Deletar participante por ID, invalidar os caches e agendar a atualização do resumo"""
+        deleted = await super().delete_by_id(id)
+        if deleted:
+            self.clear_cache()
+            self.schedule_views_refresh()
+        return deleted
+
+    async def find_by_inscricao(
+        self, nu_inscricao: str, projection: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
         """Buscar participante por número de inscrição"""
-        return await self.collection.find_one({"nu_inscricao": nu_inscricao})
-
-    async def find_by_ano(self, ano: int) -> List[Dict[str, Any]]:
-        """Buscar participantes por ano"""
-        cursor = self.collection.find({"nu_ano": ano})
-        return await cursor.to_list(length=None)
-
-    async def find_by_municipio_prova(
-        self, municipio_codigo: int
-    ) -> List[Dict[str, Any]]:
-        """Buscar participantes por município da prova"""
-        cursor = self.collection.find({"municipio_prova_codigo": municipio_codigo})
-        return await cursor.to_list(length=None)
-
-    async def get_estatisticas_por_sexo(self) -> List[Dict[str, Any]]:
-        """Obter estatísticas por sexo"""
-        sexo_map = {"M": "Masculino", "F": "Feminino"}
+        return await self.collection.find_one({"nu_inscricao": nu_inscricao}, projection)
+
+    def find_by_ano(
+        self,
+        ano: int,
+        projection: Optional[Dict[str, Any]] = None,
+        batch_size: Optional[int] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Iterar sobre os participantes de um ano, lote a lote"""
+        return self.iter_find(
+            {"nu_ano": ano}, projection, batch_size, settings.MONGO_QUERY_MAX_TIME_MS
+        )
+
+    def find_by_municipio_prova(
+        self,
+        municipio_codigo: int,
+        projection: Optional[Dict[str, Any]] = None,
+        batch_size: Optional[int] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Iterar sobre os participantes de um município da prova, lote a lote"""
+        return self.iter_find(
+            {"municipio_prova_codigo": municipio_codigo},
+            projection,
+            batch_size,
+            settings.MONGO_QUERY_MAX_TIME_MS,
+        )
+
+    # Os dados do ENEM quase não mudam: escritas limpam o cache e o resumo é
+    # recalculado VIEWS_REFRESH_DEBOUNCE_SECONDS depois (refresh_views)
+    @async_ttl_cache(ttl=3600)
+    async def _get_facetas_demograficas(self) -> Dict[str, Any]:
+        """Obter as distribuições demográficas do resumo, com fallback ao vivo"""
+        resumo, totais = await asyncio.gather(
+            self.summary_collection.find().to_list(None), self._get_totais()
+        )
+        raw_data = {documento["_id"]: documento["dados"] for documento in resumo}
+        if not raw_data:
+            # Sem resumo: cada faceta vira uma agregação própria, executadas em
+            # paralelo no servidor em vez de em sequência dentro de um $facet
+            projecao = FACETAS_DEMOGRAFICAS_PIPELINE[0]
+            facetas = FACETAS_DEMOGRAFICAS_PIPELINE[-1]["$facet"]
+            resultados = await asyncio.gather(
+                *(self.aggregate([projecao] + estagios) for estagios in facetas.values())
+            )
+            raw_data = dict(zip(facetas, resultados))
+
+        idade = raw_data.pop("idade", None)
+        if totais["total_participantes"]:
+            totais["idade_media"] = idade[0]["idade_media"] if idade else None
+            raw_data["totais"] = [totais]
+        else:
+            raw_data["totais"] = []
+
+        # Distribuições com total geral vêm como [{"total_geral", "itens"}]
+        for faceta in ("por_sexo", "por_faixa_etaria", "por_cor_raca"):
+            raw_data[faceta] = raw_data[faceta][0]["itens"] if raw_data.get(faceta) else []
+
+        # Poucos grupos (até 20): ordenados aqui em vez de um $sort por faceta
+        raw_data["por_sexo"] = _por_total(raw_data["por_sexo"])
+        raw_data["por_cor_raca"] = _por_total(raw_data["por_cor_raca"])
+        raw_data["por_faixa_etaria"].sort(
+            key=lambda item: (item["_id"] is not None, item["_id"] or 0)
+        )
+        return raw_data
+
+    async def _get_totais(self) -> Dict[str, Any]:
+        """Contar participantes pelos metadados e treineiros pelo índice"""
+        total_participantes, total_treineiros = await asyncio.gather(
+            self.analytics_collection.estimated_document_count(),
+            self.analytics_collection.count_documents(
+                {"treineiro": True}, **self._hint(TREINEIRO_INDEX)
+            ),
+        )
+        return {
+            "total_participantes": total_participantes,
+            "total_treineiros": total_treineiros,
+        }
 
-        pipeline = [
+    async def refresh_summary(self) -> None:
+        """Recalcular o resumo demográfico (um documento por faceta) via $merge"""
+        facetas = FACETAS_DEMOGRAFICAS_PIPELINE[-1]["$facet"]
+        pipeline = FACETAS_DEMOGRAFICAS_PIPELINE + [
+            {
+                "$project": {
+                    "_id": 0,
+                    "facetas": [
+                        {"_id": faceta, "dados": f"${faceta}"} for faceta in facetas
+                    ],
+                }
+            },
+            {"$unwind": "$facetas"},
+            {"$replaceRoot": {"newRoot": "$facetas"}},
+            {"$set": {"atualizado_em": "$$NOW"}},
             {
-                "$group": {
-                    "_id": "$sexo",
-                    "total": {"$sum": 1},
-                    "treineiros": {"$sum": {"$cond": ["$treineiro", 1, 0]}},
-                    "regulares": {
-                        "$sum": {"$cond": [{"$eq": ["$treineiro", False]}, 1, 0]}
-                    },
+                "$merge": {
+                    "into": self.summary_collection_name,
+                    "on": "_id",
+                    "whenMatched": "replace",
+                    "whenNotMatched": "insert",
                 }
             },
-            {"$sort": {"total": -1}},
         ]
+        await self.collection.aggregate(pipeline, allowDiskUse=True).to_list(None)
+        self.clear_cache()
 
-        raw_results = await self.aggregate(pipeline)
-
-        # Formatar resultados
-        formatted_results = []
-        total_geral = sum(item["total"] for item in raw_results)
-
-        for item in raw_results:
-            sexo_desc = sexo_map.get(item["_id"], item["_id"] or "Não informado")
-            formatted_results.append(
-                {
-                    "sexo": sexo_desc,
-                    "codigo": item["_id"],
-                    "total_participantes": item["total"],
-                    "participantes_regulares": item["regulares"],
-                    "treineiros": item["treineiros"],
-                    "percentual_do_total": round(
-                        (item["total"] / max(total_geral, 1)) * 100, 2
-                    ),
-                    "percentual_treineiros": round(
-                        (item["treineiros"] / max(item["total"], 1)) * 100, 2
-                    ),
-                }
-            )
+    async def get_estatisticas_por_sexo(self) -> List[Dict[str, Any]]:
+        """Obter estatísticas por sexo"""
+        facetas = await self._get_facetas_demograficas()
 
-        return formatted_results
+        return [
+            {
+                "sexo": item["descricao"],
+                "codigo": item["_id"],
+                **_estatisticas_contagem(item),
+            }
+            for item in facetas.get("por_sexo", [])
+        ]
 
     async def get_estatisticas_por_faixa_etaria(self) -> List[Dict[str, Any]]:
         """Obter estatísticas por faixa etária"""
-        faixa_etaria_map = {
-            1: "Menor que 17 anos",
-            2: "17 anos",
-            3: "18 anos",
-            4: "19 anos",
-            5: "20 anos",
-            6: "21 anos",
-            7: "22 anos",
-            8: "23 anos",
-            9: "24 anos",
-            10: "25 anos",
-            11: "Entre 26 e 30 anos",
-            12: "Entre 31 e 35 anos",
-            13: "Entre 36 e 40 anos",
-            14: "Entre 41 e 45 anos",
-            15: "Entre 46 e 50 anos",
-            16: "Entre 51 e 55 anos",
-            17: "Entre 56 e 60 anos",
-            18: "Entre 61 e 65 anos",
-            19: "Entre 66 e 70 anos",
-            20: "Maior que 70 anos",
-        }
+        # Já ordenadas por idade crescente
+        facetas = await self._get_facetas_demograficas()
 
-        pipeline = [
+        return [
             {
-                "$group": {
-                    "_id": "$faixa_etaria",
-                    "total": {"$sum": 1},
-                    "treineiros": {"$sum": {"$cond": ["$treineiro", 1, 0]}},
-                    "regulares": {
-                        "$sum": {"$cond": [{"$eq": ["$treineiro", False]}, 1, 0]}
-                    },
-                }
-            },
-            {"$sort": {"_id": 1}},  # Ordenar por idade crescente
+                "faixa_etaria": item["descricao"],
+                "codigo_faixa": item["_id"],
+                **_estatisticas_contagem(item),
+            }
+            for item in facetas.get("por_faixa_etaria", [])
         ]
 
-        raw_results = await self.aggregate(pipeline)
-
-        # Formatar resultados
-        formatted_results = []
-        total_geral = sum(item["total"] for item in raw_results)
-
-        for item in raw_results:
-            faixa_desc = faixa_etaria_map.get(item["_id"], f"Faixa {item['_id']}")
-            formatted_results.append(
-                {
-                    "faixa_etaria": faixa_desc,
-                    "codigo_faixa": item["_id"],
-                    "total_participantes": item["total"],
-                    "participantes_regulares": item["regulares"],
-                    "treineiros": item["treineiros"],
-                    "percentual_do_total": round(
-                        (item["total"] / max(total_geral, 1)) * 100, 2
-                    ),
-                    "percentual_treineiros": round(
-                        (item["treineiros"] / max(item["total"], 1)) * 100, 2
-                    ),
-                }
-            )
-
-        return formatted_results
-
     async def get_estatisticas_por_cor_raca(self) -> List[Dict[str, Any]]:
         """Obter estatísticas por cor/raça"""
-        cor_raca_map = {
-            0: "Não declarado",
-            1: "Branca",
-            2: "Preta",
-            3: "Parda",
-            4: "Amarela",
-            5: "Indígena",
-        }
+        facetas = await self._get_facetas_demograficas()
 
-        pipeline = [
+        return [
             {
-                "$group": {
-                    "_id": "$cor_raca",
-                    "total": {"$sum": 1},
-                    "treineiros": {"$sum": {"$cond": ["$treineiro", 1, 0]}},
-                    "regulares": {
-                        "$sum": {"$cond": [{"$eq": ["$treineiro", False]}, 1, 0]}
-                    },
-                }
-            },
-            {"$sort": {"total": -1}},
+                "cor_raca": item["descricao"],
+                "codigo": item["_id"],
+                **_estatisticas_contagem(item),
+            }
+            for item in facetas.get("por_cor_raca", [])
         ]
 
-        raw_results = await self.aggregate(pipeline)
-
-        # Formatar resultados
-        formatted_results = []
-        total_geral = sum(item["total"] for item in raw_results)
-
-        for item in raw_results:
-            cor_desc = cor_raca_map.get(item["_id"], f"Código {item['_id']}")
-            formatted_results.append(
-                {
-                    "cor_raca": cor_desc,
-                    "codigo": item["_id"],
-                    "total_participantes": item["total"],
-                    "participantes_regulares": item["regulares"],
-                    "treineiros": item["treineiros"],
-                    "percentual_do_total": round(
-                        (item["total"] / max(total_geral, 1)) * 100, 2
-                    ),
-                    "percentual_treineiros": round(
-                        (item["treineiros"] / max(item["total"], 1)) * 100, 2
-                    ),
-                }
-            )
-
-        return formatted_results
-
     async def get_distribuicao_idade(self) -> List[Dict[str, Any]]:
         """Obter distribuição de idades dos participantes"""
-        faixa_etaria_map = {
-            1: "Menor que 17 anos",
-            2: "17 anos",
-            3: "18 anos",
-            4: "19 anos",
-            5: "20 anos",
-            6: "21 anos",
-            7: "22 anos",
-            8: "23 anos",
-            9: "24 anos",
-            10: "25 anos",
-            11: "Entre 26 e 30 anos",
-            12: "Entre 31 e 35 anos",
-            13: "Entre 36 e 40 anos",
-            14: "Entre 41 e 45 anos",
-            15: "Entre 46 e 50 anos",
-            16: "Entre 51 e 55 anos",
-            17: "Entre 56 e 60 anos",
-            18: "Entre 61 e 65 anos",
-            19: "Entre 66 e 70 anos",
-            20: "Maior que 70 anos",
-        }
-
-        pipeline = [
-            {
-                "$group": {
-                    "_id": "$faixa_etaria",
-                    "total": {"$sum": 1},
-                    "treineiros": {"$sum": {"$cond": ["$treineiro", 1, 0]}},
-                    "regulares": {
-                        "$sum": {"$cond": [{"$eq": ["$treineiro", False]}, 1, 0]}
-                    },
-                }
-            },
-            {
-                "$sort": {"total": -1}
-            },  # Ordenar por quantidade (mais representativas primeiro)
-        ]
-
-        raw_results = await self.aggregate(pipeline)
-
-        # Formatar resultados
-        formatted_results = []
-        total_geral = sum(item["total"] for item in raw_results)
-
-        for item in raw_results:
-            faixa_desc = faixa_etaria_map.get(item["_id"], f"Faixa {item['_id']}")
-            formatted_results.append(
-                {
-                    "faixa_etaria": faixa_desc,
-                    "codigo_faixa": item["_id"],
-                    "total_participantes": item["total"],
-                    "participantes_regulares": item["regulares"],
-                    "treineiros": item["treineiros"],
-                    "percentual_do_total": round(
-                        (item["total"] / max(total_geral, 1)) * 100, 2
-                    ),
-                    "percentual_treineiros": round(
-                        (item["treineiros"] / max(item["total"], 1)) * 100, 2
-                    ),
-                }
-            )
-
-        return formatted_results
+        # Mesmas faixas, mais representativas primeiro
+        faixas = await self.get_estatisticas_por_faixa_etaria()
+        return sorted(faixas, key=itemgetter("total_participantes"), reverse=True)
 
     async def get_estatisticas_demograficas(self) -> Dict[str, Any]:
         """Obter estatísticas demográficas completas dos participantes"""
-        # Mapeamento de códigos para descrições legíveis
-        sexo_map = {"M": "Masculino", "F": "Feminino"}
-
-        cor_raca_map = {
-            0: "Não declarado",
-            1: "Branca",
-            2: "Preta",
-            3: "Parda",
-            4: "Amarela",
-            5: "Indígena",
-        }
-
-        faixa_etaria_map = {
-            1: "Menor que 17 anos",
-            2: "17 anos",
-            3: "18 anos",
-            4: "19 anos",
-            5: "20 anos",
-            6: "21 anos",
-            7: "22 anos",
-            8: "23 anos",
-            9: "24 anos",
-            10: "25 anos",
-            11: "Entre 26 e 30 anos",
-            12: "Entre 31 e 35 anos",
-            13: "Entre 36 e 40 anos",
-            14: "Entre 41 e 45 anos",
-            15: "Entre 46 e 50 anos",
-            16: "Entre 51 e 55 anos",
-            17: "Entre 56 e 60 anos",
-            18: "Entre 61 e 65 anos",
-            19: "Entre 66 e 70 anos",
-            20: "Maior que 70 anos",
-        }
-
-        # Agregação para dados brutos
-        pipeline = [
-            {
-                "$facet": {
-                    "por_sexo": [
-                        {
-                            "$group": {
-                                "_id": "$sexo",
-                                "total": {"$sum": 1},
-                                "treineiros": {"$sum": {"$cond": ["$treineiro", 1, 0]}},
-                            }
-                        }
-                    ],
-                    "por_faixa_etaria": [
-                        {
-                            "$group": {
-                                "_id": "$faixa_etaria",
-                                "total": {"$sum": 1},
-                                "treineiros": {"$sum": {"$cond": ["$treineiro", 1, 0]}},
-                            }
-                        },
-                        {"$sort": {"_id": 1}},
-                    ],
-                    "por_cor_raca": [
-                        {"$group": {"_id": "$cor_raca", "total": {"$sum": 1}}},
-                        {"$sort": {"total": -1}},
-                    ],
-                    "por_uf": [
-                        {"$match": {"uf_prova": {"$ne": None}}},
-                        {"$group": {"_id": "$uf_prova", "total": {"$sum": 1}}},
-                        {"$sort": {"total": -1}},
-                        {"$limit": 10},  # Top 10 UFs
-                    ],
-                    "totais": [
-                        {
-                            "$group": {
-                                "_id": None,
-                                "total_participantes": {"$sum": 1},
-                                "total_treineiros": {
-                                    "$sum": {"$cond": ["$treineiro", 1, 0]}
-                                },
-                                "total_regulares": {
-                                    "$sum": {
-                                        "$cond": [{"$eq": ["$treineiro", False]}, 1, 0]
-                                    }
-                                },
-                                "idade_media": {
-                                    "$avg": {
-                                        "$cond": [
-                                            {"$ne": ["$idade", None]},
-                                            "$idade",
-                                            0,
-                                        ]
-                                    }
-                                },
-                            }
-                        }
-                    ],
-                }
-            }
-        ]
-
-        raw_result = await self.aggregate(pipeline)
-        if not raw_result:
+        raw_data = await self._get_facetas_demograficas()
+        if not raw_data:
             return {}
 
-        raw_data = raw_result[0]
-
         # Formatação dos dados para apresentação mais limpa
         formatted_result = {
             "resumo_geral": {},
@@ -369,44 +445,36 @@ class ParticipanteRepository(BaseRepository):
         # Resumo geral
         if raw_data.get("totais"):
             totals = raw_data["totais"][0]
+            total = totals["total_participantes"]
+            treineiros = totals["total_treineiros"]
+            idade_media = totals["idade_media"]
             formatted_result["resumo_geral"] = {
-                "total_participantes": totals.get("total_participantes", 0),
-                "participantes_regulares": totals.get("total_regulares", 0),
-                "treineiros": totals.get("total_treineiros", 0),
-                "percentual_treineiros": round(
-                    (
-                        totals.get("total_treineiros", 0)
-                        / max(totals.get("total_participantes", 1), 1)
-                    )
-                    * 100,
-                    2,
-                ),
-                "idade_media": round(totals.get("idade_media", 0), 1)
-                if totals.get("idade_media")
-                else "Não informado",
+                "total_participantes": total,
+                "participantes_regulares": total - treineiros,
+                "treineiros": treineiros,
+                # totais só existe com total_participantes > 0
+                "percentual_treineiros": round(treineiros / total * 100, 2),
+                "idade_media": round(idade_media, 1) if idade_media else "Não informado",
             }
 
         # Distribuição por sexo
         if raw_data.get("por_sexo"):
-            total_geral = sum(item["total"] for item in raw_data["por_sexo"])
             for item in raw_data["por_sexo"]:
-                sexo_desc = sexo_map.get(item["_id"], item["_id"] or "Não informado")
-                formatted_result["distribuicao_por_sexo"][sexo_desc] = {
+                formatted_result["distribuicao_por_sexo"][item["descricao"]] = {
                     "total": item["total"],
-                    "percentual": round((item["total"] / max(total_geral, 1)) * 100, 2),
+                    "percentual": item["percentual_do_total"],
                     "treineiros": item["treineiros"],
                     "regulares": item["total"] - item["treineiros"],
                 }
 
         if raw_data.get("por_faixa_etaria"):
-            faixa_etaria_sorted = sorted(
-                raw_data["por_faixa_etaria"], key=lambda x: x["total"], reverse=True
-            )[:5]
+            faixa_etaria_sorted = heapq.nlargest(
+                5, raw_data["por_faixa_etaria"], key=itemgetter("total")
+            )
             for item in faixa_etaria_sorted:
-                faixa_desc = faixa_etaria_map.get(item["_id"], f"Faixa {item['_id']}")
                 formatted_result["distribuicao_por_idade"].append(
                     {
-                        "faixa_etaria": faixa_desc,
+                        "faixa_etaria": item["descricao"],
                         "total": item["total"],
                         "treineiros": item["treineiros"],
                         "regulares": item["total"] - item["treineiros"],
@@ -415,78 +483,57 @@ class ParticipanteRepository(BaseRepository):
 
         if raw_data.get("por_cor_raca"):
             for item in raw_data["por_cor_raca"][:5]:  # Top 5
-                cor_desc = cor_raca_map.get(item["_id"], f"Código {item['_id']}")
                 formatted_result["distribuicao_por_cor_raca"].append(
                     {
-                        "cor_raca": cor_desc,
+                        "cor_raca": item["descricao"],
                         "total": item["total"],
-                        "percentual": round(
-                            (
-                                item["total"]
-                                / max(
-                                    formatted_result["resumo_geral"].get(
-                                        "total_participantes", 1
-                                    ),
-                                    1,
-                                )
-                            )
-                            * 100,
-                            2,
-                        ),
+                        "percentual": item["percentual_do_total"],
                     }
                 )
 
         if raw_data.get("por_uf"):
             for item in raw_data["por_uf"]:
                 formatted_result["top_ufs"].append(
-                    {"uf": item["_id"], "total_participantes": item["total"]}
+                    {"uf": item["_id"], "total_participantes": item["count"]}
                 )
 
         return formatted_result
 
+    @async_ttl_cache(ttl=3600)
     async def get_participantes_por_uf(
         self, uf_sigla: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """Obter contagem de participantes por UF"""
-        match_stage = {"uf_prova": {"$ne": None}}
+        # O filtro sempre inclui o $type do índice parcial, para que ele possa ser usado
+        match_stage = {"uf_prova": {"$type": "string"}}
 
         if uf_sigla:
-            match_stage["uf_prova"] = uf_sigla.upper()
-
-        pipeline = [
-            {"$match": match_stage},
-            {
-                "$group": {
-                    "_id": "$uf_prova",
-                    "total": {"$sum": 1},
-                    "treineiros": {"$sum": {"$cond": ["$treineiro", 1, 0]}},
-                    "regulares": {
-                        "$sum": {"$cond": [{"$eq": ["$treineiro", False]}, 1, 0]}
-                    },
-                }
-            },
-            {"$sort": {"total": -1}},
-        ]
-
-        raw_results = await self.aggregate(pipeline)
-
-        formatted_results = []
-        total_geral = sum(item["total"] for item in raw_results)
-
-        for item in raw_results:
-            formatted_results.append(
-                {
-                    "uf": item["_id"],
-                    "total_participantes": item["total"],
-                    "participantes_regulares": item["regulares"],
-                    "treineiros": item["treineiros"],
-                    "percentual_do_total": round(
-                        (item["total"] / max(total_geral, 1)) * 100, 2
-                    ),
-                    "percentual_treineiros": round(
-                        (item["treineiros"] / max(item["total"], 1)) * 100, 2
-                    ),
-                }
+            match_stage["uf_prova"]["$eq"] = uf_sigla.upper()
+
+        raw_result = await self.aggregate(
+            _pipeline_contagem_por("uf_prova", match_stage),
+            length=1,
+            **self._hint(UF_TREINEIRO_INDEX),
+        )
+        itens = _por_total(raw_result[0]["itens"]) if raw_result else []
+
+        return [{"uf": item["_id"], **_estatisticas_contagem(item)} for item in itens]
+
+    async def get_dashboard(self) -> Dict[str, Any]:
+        """Obter todas as estatísticas de participantes em paralelo"""
+        por_sexo, por_faixa_etaria, por_cor_raca, distribuicao_idade, por_uf = (
+            await asyncio.gather(
+                self.get_estatisticas_por_sexo(),
+                self.get_estatisticas_por_faixa_etaria(),
+                self.get_estatisticas_por_cor_raca(),
+                self.get_distribuicao_idade(),
+                self.get_participantes_por_uf(),
             )
-
-        return formatted_results
+        )
+        return {
+            "por_sexo": por_sexo,
+            "por_faixa_etaria": por_faixa_etaria,
+            "por_cor_raca": por_cor_raca,
+            "distribuicao_idade": distribuicao_idade,
+            "por_uf": por_uf,
+        }
@@ -1,206 +1,711 @@
-from typing import Any, Dict, List, Optional
+import asyncio
+from datetime import datetime, timezone
+from operator import itemgetter
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReturnDocument
 
-from .base_repository import BaseRepository
+from config.logs import logger
+from config.settings import settings
+from infra.cache import TTLCache, async_ttl_cache
+from models.base import MongoBaseModel
+from models.resultado import FAIXAS_REDACAO, NOTAS_AREAS
+
+from .base_repository import BaseRepository, _id_filter, analytics_view
+
+
+# Migração que preenche os campos calculados dos resultados carregados antes
+# deles existirem (a carga atual já os grava)
+CAMPOS_CALCULADOS_MIGRATION_ID = "resultados_campos_calculados"
+
+# Campos retornados na listagem de destaques (sem respostas e gabaritos)
+DESTAQUE_PROJECTION = {
+    "_id": 0,
+    "nu_sequencial": 1,
+    "participante_inscricao": 1,
+    "nu_ano": 1,
+    "escola_codigo": 1,
+    "uf_prova_sigla": 1,
+    "municipio_prova_nome": 1,
+    "nota_cn": 1,
+    "nota_ch": 1,
+    "nota_lc": 1,
+    "nota_mt": 1,
+    "nota_redacao": 1,
+    "media_provas_objetivas": 1,
+    "total_acertos": 1,
+}
+
+
+# Mapeamento das áreas para nomes mais descritivos
+AREAS_MAP = {
+    "cn": "Ciências da Natureza",
+    "ch": "Ciências Humanas",
+    "lc": "Linguagens e Códigos",
+    "mt": "Matemática",
+    "redacao": "Redação",
+}
+
+
+# Descrição de cada faixa da redação, pelo limite inferior gravado em faixa_redacao
+FAIXAS_REDACAO_INFO = {
+    0: {"nome": "Muito Baixa", "descricao": "0 - 199 pontos", "min": 0, "max": 199},
+    200: {"nome": "Baixa", "descricao": "200 - 399 pontos", "min": 200, "max": 399},
+    400: {"nome": "Média", "descricao": "400 - 599 pontos", "min": 400, "max": 599},
+    600: {"nome": "Boa", "descricao": "600 - 799 pontos", "min": 600, "max": 799},
+    800: {"nome": "Excelente", "descricao": "800 - 1000 pontos", "min": 800, "max": 1000},
+    "Outros": {"nome": "Inválidas", "descricao": "Notas nulas ou inválidas", "min": None, "max": None}
+}
+
+FAIXA_DESCONHECIDA = {"nome": "Desconhecida", "descricao": "N/A"}
+
+
+def _info_faixa_redacao(faixa_id: Any) -> Dict[str, Any]:
+    """Obter a descrição da faixa da redação"""
+    return FAIXAS_REDACAO_INFO.get(faixa_id, FAIXA_DESCONHECIDA)
+
+
+# Chaves das áreas no ranking por UF
+AREAS_CHAVES = {
+    "cn": "ciencias_natureza",
+    "ch": "ciencias_humanas",
+    "lc": "linguagens_codigos",
+    "mt": "matematica",
+    "redacao": "redacao",
+}
+
+# Mapeamento das UFs para nomes completos
+UFS_NOMES = {
+    "AC": "Acre", "AL": "Alagoas", "AP": "Amapá", "AM": "Amazonas",
+    "BA": "Bahia", "CE": "Ceará", "DF": "Distrito Federal", "ES": "Espírito Santo",
+    "GO": "Goiás", "MA": "Maranhão", "MT": "Mato Grosso", "MS": "Mato Grosso do Sul",
+    "MG": "Minas Gerais", "PA": "Pará", "PB": "Paraíba", "PR": "Paraná",
+    "PE": "Pernambuco", "PI": "Piauí", "RJ": "Rio de Janeiro", "RN": "Rio Grande do Norte",
+    "RS": "Rio Grande do Sul", "RO": "Rondônia", "RR": "Roraima", "SC": "Santa Catarina",
+    "SP": "São Paulo", "SE": "Sergipe", "TO": "Tocantins"
+}
+
+# Nome da UF resolvido no servidor; siglas desconhecidas ficam como estão
+UF_NOME = {
+    "$switch": {
+        "branches": [
+            {"case": {"$eq": ["$_id", sigla]}, "then": nome}
+            for sigla, nome in UFS_NOMES.items()
+        ],
+        "default": "$_id",
+    }
+}
+
+
+# Maior nota do resultado calculada no servidor ($max ignora notas ausentes)
+MAX_NOTA = {"$max": [f"${campo}" for campo in NOTAS_AREAS]}
+
+
+def _filtro_notas_acima(nota_corte: float) -> Dict[str, Any]:
+    """Montar filtro de nota acima do corte em pelo menos uma área"""
+    # Alguma nota passa do corte se, e só se, a maior delas passa
+    return {"max_nota": {"$gte": nota_corte}}
+
+
+# Índice que cobre o agrupamento das notas por escola (usado como hint)
+ESCOLA_NOTAS_INDEX = [
+    ("escola_codigo", ASCENDING),
+    ("nota_cn", ASCENDING),
+    ("nota_ch", ASCENDING),
+    ("nota_lc", ASCENDING),
+    ("nota_mt", ASCENDING),
+    ("nota_redacao", ASCENDING),
+]
+
+# Índice que cobre o rollup de notas por UF (usado como hint)
+UF_NOTAS_INDEX = [
+    ("uf_prova_sigla", ASCENDING),
+    ("nota_cn", ASCENDING),
+    ("nota_ch", ASCENDING),
+    ("nota_lc", ASCENDING),
+    ("nota_mt", ASCENDING),
+    ("nota_redacao", ASCENDING),
+]
+
+# Índice da distribuição das notas de redação por faixa (usado como hint)
+FAIXA_REDACAO_INDEX = [("faixa_redacao", ASCENDING), ("nota_redacao", ASCENDING)]
+
+
+def _pipeline_rollup_uf() -> List[Dict[str, Any]]:
+    """Montar o agrupamento por UF com somas e contagens de notas por área"""
+    return [
+        {
+            "$group": {
+                "_id": "$uf_prova_sigla",
+                "total_participantes": {"$sum": 1},
+                **{f"soma_{area}": {"$sum": f"$nota_{area}"} for area in AREAS_MAP},
+                **{
+                    f"n_{area}": {"$sum": {"$cond": [{"$isNumber": f"$nota_{area}"}, 1, 0]}}
+                    for area in AREAS_MAP
+                },
+            }
+        },
+        {"$match": {"_id": {"$nin": [None, ""]}}},
+    ]
+
+
+def _pipeline_distribuicao_redacao() -> List[Dict[str, Any]]:
+    """Montar a distribuição das notas de redação por faixa, com o resumo geral"""
+    return [
+        {
+            # A faixa já vem gravada em cada resultado; sem faixa = "Outros"
+            "$group": {
+                "_id": {"$ifNull": ["$faixa_redacao", "Outros"]},
+                "count": {"$sum": 1},
+                "media": {"$avg": "$nota_redacao"},
+                "nota_maxima": {"$max": "$nota_redacao"},
+                "nota_minima": {"$min": "$nota_redacao"},
+            }
+        },
+        # Números antes de strings: faixas em ordem e "Outros" por último
+        {"$sort": {"_id": 1}},
+        {
+            "$group": {
+                "_id": None,
+                "faixas": {"$push": "$$ROOT"},
+                "total": {"$sum": "$count"},
+            }
+        },
+        {
+            # Percentual e média arredondada de cada faixa calculados no servidor
+            "$project": {
+                "_id": 0,
+                "total": 1,
+                "faixas": {
+                    "$map": {
+                        "input": "$faixas",
+                        "as": "faixa",
+                        "in": {
+                            "$mergeObjects": [
+                                "$$faixa",
+                                {
+                                    "media": {"$round": ["$$faixa.media", 2]},
+                                    "percentual": {
+                                        "$round": [
+                                            {
+                                                "$multiply": [
+                                                    {"$divide": ["$$faixa.count", {"$max": ["$total", 1]}]},
+                                                    100,
+                                                ]
+                                            },
+                                            2,
+                                        ]
+                                    },
+                                },
+                            ]
+                        },
+                    }
+                },
+            }
+        },
+        {
+            # Resumo geral: faixa com mais participantes (a primeira, em caso
+            # de empate), total com nota válida e média ponderada das faixas
+            "$addFields": {
+                "faixa_predominante": {
+                    "$reduce": {
+                        "input": "$faixas",
+                        "initialValue": None,
+                        "in": {
+                            "$cond": [
+                                {
+                                    "$or": [
+                                        {"$eq": ["$$value", None]},
+                                        {"$gt": ["$$this.count", "$$value.count"]},
+                                    ]
+                                },
+                                "$$this",
+                                "$$value",
+                            ]
+                        },
+                    }
+                },
+                "participantes_com_nota_valida": {
+                    "$subtract": [
+                        "$total",
+                        {
+                            "$sum": {
+                                "$map": {
+                                    "input": "$faixas",
+                                    "as": "faixa",
+                                    "in": {
+                                        "$cond": [
+                                            {"$eq": ["$$faixa._id", "Outros"]},
+                                            "$$faixa.count",
+                                            0,
+                                        ]
+                                    },
+                                }
+                            }
+                        },
+                    ]
+                },
+                "media_geral_redacao": {
+                    "$round": [
+                        {
+                            "$divide": [
+                                {
+                                    "$sum": {
+                                        "$map": {
+                                            "input": "$faixas",
+                                            "as": "faixa",
+                                            "in": {"$multiply": ["$$faixa.media", "$$faixa.count"]},
+                                        }
+                                    }
+                                },
+                                {
+                                    "$max": [
+                                        {
+                                            "$sum": {
+                                                "$map": {
+                                                    "input": "$faixas",
+                                                    "as": "faixa",
+                                                    "in": {
+                                                        "$cond": [
+                                                            {"$ne": ["$$faixa.media", None]},
+                                                            "$$faixa.count",
+                                                            0,
+                                                        ]
+                                                    },
+                                                }
+                                            }
+                                        },
+                                        1,
+                                    ]
+                                },
+                            ]
+                        },
+                        2,
+                    ]
+                },
+            }
+        },
+    ]
 
 
 class ResultadoRepository(BaseRepository):
+    indexes = [
+        IndexModel([("nu_sequencial", ASCENDING)], unique=True),
+        IndexModel([("participante_inscricao", ASCENDING)]),
+        IndexModel([("escola_codigo", ASCENDING)]),
+        IndexModel([("nu_ano", ASCENDING)]),
+        # Cobre o agrupamento por escola usado no ranking de desempenho
+        IndexModel(ESCOLA_NOTAS_INDEX),
+        # Cobre o rollup por UF: somas e contagens ($isNumber) leem só o índice
+        IndexModel(UF_NOTAS_INDEX),
+        # Notas acima do corte: busca por intervalo na maior nota do resultado,
+        # e a ordenação por redação usa o próprio índice
+        IndexModel([("max_nota", DESCENDING)]),
+        IndexModel([("nota_redacao", DESCENDING)]),
+        # Distribuição da redação: agrupamento pela faixa gravada em cada resultado
+        IndexModel(FAIXA_REDACAO_INDEX),
+        # Contagem por período de cadastro nas estatísticas por período
+        IndexModel([("created_at", ASCENDING)]),
+    ]
+
+    # Totais por nota de corte: a paginação não precisa recontar a cada página
+    _count_cache = TTLCache(maxsize=1024, ttl=60)
+
+    # Rollup com somas e contagens por UF (ver refresh_uf_stats)
+    uf_stats_collection_name = "resultados_uf_stats"
+
+    # Distribuição das notas de redação (ver refresh_distribuicao_redacao)
+    distribuicao_redacao_collection_name = "resultados_distribuicao_redacao"
+
+    # Médias gerais por área (ver refresh_medias_por_area)
+    medias_area_collection_name = "resultados_medias_area"
+
     def __init__(self, database: AsyncIOMotorDatabase):
         super().__init__(database, "resultados")
+        self.uf_stats_collection = analytics_view(database[self.uf_stats_collection_name])
+        self.distribuicao_redacao_collection = analytics_view(
+            database[self.distribuicao_redacao_collection_name]
+        )
+        self.medias_area_collection = analytics_view(
+            database[self.medias_area_collection_name]
+        )
+
+    async def migrar_campos_calculados(self) -> bool:
+        """Preencher faixa_redacao e max_nota dos resultados antigos, uma única vez por banco"""
+        # Registro em migrations reservado antes de rodar: só um worker executa os
+        # update_many, e as subidas seguintes nem varrem a coleção
+        migrations = self.database["migrations"]
+        anterior = await migrations.find_one_and_update(
+            {"_id": CAMPOS_CALCULADOS_MIGRATION_ID},
+            {"$setOnInsert": {"aplicada_em": datetime.now(timezone.utc)}},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE,
+        )
+        if anterior is not None:
+            return False
+        try:
+            faixas, max_notas = await asyncio.gather(
+                self.backfill_faixa_redacao(), self.backfill_max_nota()
+            )
+        except Exception:
+            # Liberar o registro para a migração ser tentada de novo na próxima subida
+            await migrations.delete_one({"_id": CAMPOS_CALCULADOS_MIGRATION_ID})
+            raise
+        logger.info(
+            f"Migração {CAMPOS_CALCULADOS_MIGRATION_ID}: {faixas} faixa_redacao "
+            f"e {max_notas} max_nota preenchidos"
+        )
+        return True
+
+    async def backfill_max_nota(self) -> int:
+        """Gravar max_nota nos resultados carregados antes do campo existir"""
+        result = await self.collection.update_many(
+            {"max_nota": {"$exists": False}}, [{"$set": {"max_nota": MAX_NOTA}}]
+        )
+        return result.modified_count
+
+    async def backfill_faixa_redacao(self) -> int:
+        """Gravar faixa_redacao nos resultados carregados antes do campo existir"""
+        faixa = {
+            "$switch": {
+                "branches": [
+                    {
+                        "case": {
+                            "$and": [
+                                {"$gte": ["$nota_redacao", inicio]},
+                                {"$lt": ["$nota_redacao", fim]},
+                            ]
+                        },
+                        "then": inicio,
+                    }
+                    for inicio, fim in zip(FAIXAS_REDACAO, FAIXAS_REDACAO[1:])
+                ],
+                "default": None,
+            }
+        }
+        result = await self.collection.update_many(
+            {"faixa_redacao": {"$exists": False}, "nota_redacao": {"$type": "number"}},
+            [{"$set": {"faixa_redacao": faixa}}],
+        )
+        return result.modified_count
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Esvaziar o cache de contagens e das estatísticas agregadas"""
+        cls._count_cache.clear()
+        cls.get_media_notas_por_area.cache_clear()
+        cls.get_media_por_uf.cache_clear()
+        cls.get_distribuicao_notas_redacao.cache_clear()
+
+    async def refresh_views(self) -> None:
+        """Recalcular as visões de estatísticas derivadas dos resultados"""
+        # escola_stats também deriva dos resultados, mas é recalculada só no
+        # ciclo diário ou em /admin/refresh-views (o $lookup em escolas é caro)
+        await asyncio.gather(
+            self.refresh_uf_stats(),
+            self.refresh_distribuicao_redacao(),
+            self.refresh_medias_por_area(),
+        )
+
+    async def create(self, document: MongoBaseModel) -> MongoBaseModel:
+        """Criar resultado, invalidar os caches e agendar a atualização das visões"""
+        created = await super().create(document)
+        self.clear_cache()
+        self.schedule_views_refresh()
+        return created
+
+    async def update_by_id(self, id: str, update_dict: Dict[str, Any]) -> bool:
+        """Atualizar resultado por ID, invalidar os caches e agendar a atualização das visões"""
+        updated = await super().update_by_id(id, update_dict)
+        if updated:
+            if any(campo in update_dict for campo in NOTAS_AREAS):
+                # A maior nota depende também das notas que não vieram no update
+                await self.collection.update_one(
+                    _id_filter(id), [{"$set": {"max_nota": MAX_NOTA}}]
+                )
+            self.clear_cache()
+            self.schedule_views_refresh()
+        return updated
+
+    async def delete_by_id(self, id: str) -> bool:
+        """Deletar resultado por ID, invalidar os caches e agendar a atualização das visões"""
+        deleted = await super().delete_by_id(id)
+        if deleted:
+            self.clear_cache()
+            self.schedule_views_refresh()
+        return deleted
 
     async def find_by_participante(
-        self, participante_inscricao: str
+        self, participante_inscricao: str, projection: Optional[Dict[str, Any]] = None
     ) -> Optional[Dict[str, Any]]:
         """Buscar resultado por participante"""
         return await self.collection.find_one(
-            {"participante_inscricao": participante_inscricao}
+            {"participante_inscricao": participante_inscricao}, projection
         )
 
-    async def find_by_escola(self, escola_codigo: int) -> List[Dict[str, Any]]:
-        """Buscar resultados por escola"""
-        cursor = self.collection.find({"escola_codigo": escola_codigo})
-        return await cursor.to_list(length=None)
+    def find_by_escola(
+        self,
+        escola_codigo: int,
+        projection: Optional[Dict[str, Any]] = None,
+        batch_size: Optional[int] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Iterar sobre os resultados de uma escola, lote a lote"""
+        return self.iter_find(
+            {"escola_codigo": escola_codigo},
+            projection,
+            batch_size,
+            settings.MONGO_QUERY_MAX_TIME_MS,
+        )
 
-    async def find_by_ano(self, ano: int) -> List[Dict[str, Any]]:
-        """Buscar resultados por ano"""
-        cursor = self.collection.find({"nu_ano": ano})
-        return await cursor.to_list(length=None)
+    def find_by_ano(
+        self,
+        ano: int,
+        projection: Optional[Dict[str, Any]] = None,
+        batch_size: Optional[int] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Iterar sobre os resultados de um ano, lote a lote"""
+        return self.iter_find(
+            {"nu_ano": ano}, projection, batch_size, settings.MONGO_QUERY_MAX_TIME_MS
+        )
 
-    async def get_media_notas_por_area(self) -> Dict[str, Any]:
-        """Obter média das notas por área"""
-        # Mapeamento das áreas para nomes mais descritivos
-        areas_map = {
-            "cn": "Ciências da Natureza",
-            "ch": "Ciências Humanas", 
-            "lc": "Linguagens e Códigos",
-            "mt": "Matemática",
-            "redacao": "Redação"
-        }
-        
-        pipeline = [
+    @staticmethod
+    def _pipeline_medias_por_area() -> List[Dict[str, Any]]:
+        """Estágios que calculam médias e participação por área"""
+        return [
             {
                 "$group": {
                     "_id": None,
-                    "media_cn": {"$avg": "$nota_cn"},
-                    "media_ch": {"$avg": "$nota_ch"},
-                    "media_lc": {"$avg": "$nota_lc"},
-                    "media_mt": {"$avg": "$nota_mt"},
-                    "media_redacao": {"$avg": "$nota_redacao"},
+                    **{f"media_{area}": {"$avg": f"$nota_{area}"} for area in AREAS_MAP},
                     "total_resultados": {"$sum": 1},
-                    "participantes_cn": {"$sum": {"$cond": [{"$ne": ["$nota_cn", None]}, 1, 0]}},
-                    "participantes_ch": {"$sum": {"$cond": [{"$ne": ["$nota_ch", None]}, 1, 0]}},
-                    "participantes_lc": {"$sum": {"$cond": [{"$ne": ["$nota_lc", None]}, 1, 0]}},
-                    "participantes_mt": {"$sum": {"$cond": [{"$ne": ["$nota_mt", None]}, 1, 0]}},
-                    "participantes_redacao": {"$sum": {"$cond": [{"$ne": ["$nota_redacao", None]}, 1, 0]}}
+                    # $isNumber, como no rollup por UF: resultados criados pela API
+                    # omitem as notas ausentes (exclude_none), e {"$ne": [campo, None]}
+                    # contava o campo ausente
+                    **{
+                        f"participantes_{area}": {
+                            "$sum": {"$cond": [{"$isNumber": f"$nota_{area}"}, 1, 0]}
+                        }
+                        for area in AREAS_MAP
+                    },
                 }
-            }
+            },
+            {
+                # Arredondamentos e percentuais calculados no servidor
+                "$project": {
+                    "total_resultados": 1,
+                    "media_geral_enem": {
+                        "$round": [
+                            {"$divide": [{"$add": ["$media_cn", "$media_ch", "$media_lc", "$media_mt"]}, 4]},
+                            2,
+                        ]
+                    },
+                    **{f"media_{area}": {"$round": [f"$media_{area}", 2]} for area in AREAS_MAP},
+                    **{f"participantes_{area}": 1 for area in AREAS_MAP},
+                    **{
+                        f"percentual_{area}": {
+                            "$round": [
+                                {
+                                    "$multiply": [
+                                        {"$divide": [f"$participantes_{area}", {"$max": ["$total_resultados", 1]}]},
+                                        100,
+                                    ]
+                                },
+                                2,
+                            ]
+                        }
+                        for area in AREAS_MAP
+                    },
+                }
+            },
         ]
-        
-        raw_result = await self.aggregate(pipeline)
-        if not raw_result:
-            return {}
-            
-        data = raw_result[0]
-        
-        formatted_result = {
+
+    @staticmethod
+    def _formatar_medias_por_area(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Formatar o resultado do pipeline de médias por área"""
+        # Cada média lida uma única vez do documento agregado
+        medias = {area: data.get(f"media_{area}") for area in AREAS_MAP}
+        objetivas_completas = all(medias[area] for area in ("cn", "ch", "lc", "mt"))
+
+        return {
             "resumo_geral": {
                 "total_resultados": data.get("total_resultados", 0),
-                "media_geral_enem": round(
-                    (
-                        (data.get("media_cn", 0) or 0) +
-                        (data.get("media_ch", 0) or 0) + 
-                        (data.get("media_lc", 0) or 0) +
-                        (data.get("media_mt", 0) or 0)
-                    ) / 4, 2
-                ) if all([data.get("media_cn"), data.get("media_ch"), 
-                         data.get("media_lc"), data.get("media_mt")]) else "Não calculável"
+                "media_geral_enem": data["media_geral_enem"]
+                if objetivas_completas else "Não calculável"
             },
-            "medias_por_area": []
+            "medias_por_area": sorted(
+                (
+                    {
+                        "area": nome,
+                        "codigo_area": area,
+                        "media": medias[area],
+                        "total_participantes": data.get(f"participantes_{area}", 0),
+                        "percentual_participacao": data.get(f"percentual_{area}"),
+                    }
+                    for area, nome in AREAS_MAP.items()
+                    if medias[area] is not None
+                ),
+                key=itemgetter("media"),
+                reverse=True,
+            ),
         }
-        
-        areas_data = [
-            ("cn", data.get("media_cn"), data.get("participantes_cn", 0)),
-            ("ch", data.get("media_ch"), data.get("participantes_ch", 0)),
-            ("lc", data.get("media_lc"), data.get("participantes_lc", 0)),
-            ("mt", data.get("media_mt"), data.get("participantes_mt", 0)),
-            ("redacao", data.get("media_redacao"), data.get("participantes_redacao", 0))
+
+    async def refresh_medias_por_area(self) -> None:
+        """Recalcular as médias gerais por área e gravá-las via $merge"""
+        pipeline = self._pipeline_medias_por_area() + [
+            # Documento único, substituído a cada atualização
+            {"$set": {"_id": "geral", "atualizado_em": "$$NOW"}},
+            {
+                "$merge": {
+                    "into": self.medias_area_collection_name,
+                    "on": "_id",
+                    "whenMatched": "replace",
+                    "whenNotMatched": "insert",
+                }
+            },
         ]
-        
-        for area_code, media, participantes in areas_data:
-            if media is not None:
-                formatted_result["medias_por_area"].append({
-                    "area": areas_map[area_code],
-                    "codigo_area": area_code,
-                    "media": round(media, 2),
-                    "total_participantes": participantes,
-                    "percentual_participacao": round(
-                        (participantes / max(data.get("total_resultados", 1), 1)) * 100, 2
-                    )
-                })
-        
-        formatted_result["medias_por_area"].sort(key=lambda x: x["media"], reverse=True)
-        
-        return formatted_result
+        await self.collection.aggregate(pipeline, allowDiskUse=True).to_list(None)
+        self.get_media_notas_por_area.cache_clear()
+
+    # Os resultados só mudam em cargas e escritas; escritas limpam o cache e a
+    # visão é recalculada VIEWS_REFRESH_DEBOUNCE_SECONDS depois (refresh_views)
+    @async_ttl_cache(ttl=3600)
+    async def get_media_notas_por_area(self) -> Dict[str, Any]:
+        """Obter média das notas por área"""
+        # Lida da visão materializada; sem ela, agrega a coleção inteira
+        medias = await self.medias_area_collection.find_one({"_id": "geral"})
+        if medias:
+            return self._formatar_medias_por_area(medias)
+
+        raw_result = await self.aggregate(self._pipeline_medias_por_area(), length=1)
+        if not raw_result:
+            return {}
+        return self._formatar_medias_por_area(raw_result[0])
 
+    async def refresh_uf_stats(self) -> None:
+        """Recalcular o rollup de notas por UF e gravá-lo via $merge"""
+        pipeline = _pipeline_rollup_uf() + [
+            {"$set": {"atualizado_em": "$$NOW"}},
+            {
+                "$merge": {
+                    "into": self.uf_stats_collection_name,
+                    "on": "_id",
+                    "whenMatched": "replace",
+                    "whenNotMatched": "insert",
+                }
+            },
+        ]
+        await self.collection.aggregate(
+            pipeline, allowDiskUse=True, **self._hint(UF_NOTAS_INDEX)
+        ).to_list(None)
+        self.get_media_por_uf.cache_clear()
+
+    @async_ttl_cache(ttl=3600)
     async def get_media_por_uf(self) -> Dict[str, Any]:
         """Obter média das notas por UF com formatação melhorada"""
-        # Mapeamento das UFs para nomes completos
-        ufs_nomes = {
-            "AC": "Acre", "AL": "Alagoas", "AP": "Amapá", "AM": "Amazonas",
-            "BA": "Bahia", "CE": "Ceará", "DF": "Distrito Federal", "ES": "Espírito Santo",
-            "GO": "Goiás", "MA": "Maranhão", "MT": "Mato Grosso", "MS": "Mato Grosso do Sul",
-            "MG": "Minas Gerais", "PA": "Pará", "PB": "Paraíba", "PR": "Paraná",
-            "PE": "Pernambuco", "PI": "Piauí", "RJ": "Rio de Janeiro", "RN": "Rio Grande do Norte",
-            "RS": "Rio Grande do Sul", "RO": "Rondônia", "RR": "Roraima", "SC": "Santa Catarina",
-            "SP": "São Paulo", "SE": "Sergipe", "TO": "Tocantins"
-        }
-        
         pipeline = [
+            {"$match": {"_id": {"$nin": [None, ""]}}},  # Skip registros sem UF
             {
-                "$group": {
-                    "_id": "$uf_prova_sigla",
-                    "media_cn": {"$avg": "$nota_cn"},
-                    "media_ch": {"$avg": "$nota_ch"},
-                    "media_lc": {"$avg": "$nota_lc"},
-                    "media_mt": {"$avg": "$nota_mt"},
-                    "media_redacao": {"$avg": "$nota_redacao"},
-                    "total_participantes": {"$sum": 1},
+                # Médias a partir das somas e contagens do rollup por UF
+                "$addFields": {
+                    f"media_{area}": {
+                        "$cond": [
+                            {"$gt": [f"$n_{area}", 0]},
+                            {"$divide": [f"$soma_{area}", f"$n_{area}"]},
+                            0,
+                        ]
+                    }
+                    for area in AREAS_MAP
                 }
-            }
-        ]
-        
-        raw_results = await self.aggregate(pipeline)
-        if not raw_results:
-            return {"ranking": [], "total_ufs": 0}
-        
-        # Formatação dos dados
-        formatted_results = []
-        for item in raw_results:
-            uf_sigla = item["_id"]
-            if not uf_sigla:  # Skip registros sem UF
-                continue
-                
-            # Calcular média geral das provas objetivas
-            medias_objetivas = [
-                item.get("media_cn", 0) or 0,
-                item.get("media_ch", 0) or 0,
-                item.get("media_lc", 0) or 0,
-                item.get("media_mt", 0) or 0
-            ]
-            media_geral = sum(medias_objetivas) / len(medias_objetivas)
-            
-            formatted_item = {
-                "posicao": 0,  # Será preenchida após ordenação
-                "uf": {
-                    "sigla": uf_sigla,
-                    "nome": ufs_nomes.get(uf_sigla, uf_sigla)
-                },
-                "total_participantes": item["total_participantes"],
-                "media_geral_objetivas": round(media_geral, 2),
-                "areas": {
-                    "ciencias_natureza": {
-                        "nome": "Ciências da Natureza",
-                        "media": round(item.get("media_cn", 0) or 0, 2)
+            },
+            {
+                # Item do ranking já no formato da resposta, com a média geral
+                # das provas objetivas
+                "$project": {
+                    "_id": 0,
+                    "uf": {"sigla": "$_id", "nome": UF_NOME},
+                    "total_participantes": 1,
+                    "media_geral_objetivas": {
+                        "$round": [
+                            {
+                                "$divide": [
+                                    {"$add": ["$media_cn", "$media_ch", "$media_lc", "$media_mt"]},
+                                    4,
+                                ]
+                            },
+                            2,
+                        ]
                     },
-                    "ciencias_humanas": {
-                        "nome": "Ciências Humanas",
-                        "media": round(item.get("media_ch", 0) or 0, 2)
+                    "areas": {
+                        chave: {
+                            "nome": AREAS_MAP[area],
+                            "media": {"$round": [f"$media_{area}", 2]},
+                        }
+                        for area, chave in AREAS_CHAVES.items()
                     },
-                    "linguagens_codigos": {
-                        "nome": "Linguagens e Códigos", 
-                        "media": round(item.get("media_lc", 0) or 0, 2)
+                }
+            },
+            # Ordenar por média de redação (critério principal) e depois por média geral
+            {"$sort": {"areas.redacao.media": -1, "media_geral_objetivas": -1}},
+            {
+                # Totais do ranking calculados no servidor, em uma única passada
+                "$group": {
+                    "_id": None,
+                    "ufs": {"$push": "$$ROOT"},
+                    "total_participantes": {"$sum": "$total_participantes"},
+                    "maior_participacao": {
+                        "$max": {
+                            "total": "$total_participantes",
+                            "sigla": "$uf.sigla",
+                            "nome": "$uf.nome",
+                        }
                     },
-                    "matematica": {
-                        "nome": "Matemática",
-                        "media": round(item.get("media_mt", 0) or 0, 2)
+                }
+            },
+            {
+                # Posição no ranking numerada no servidor
+                "$project": {
+                    "_id": 0,
+                    "total_participantes": 1,
+                    "maior_participacao": {
+                        "sigla": "$maior_participacao.sigla",
+                        "nome": "$maior_participacao.nome",
+                    },
+                    "ranking": {
+                        "$map": {
+                            "input": {"$range": [0, {"$size": "$ufs"}]},
+                            "as": "i",
+                            "in": {
+                                "$mergeObjects": [
+                                    {"posicao": {"$add": ["$$i", 1]}},
+                                    {"$arrayElemAt": ["$ufs", "$$i"]},
+                                ]
+                            },
+                        }
                     },
-                    "redacao": {
-                        "nome": "Redação",
-                        "media": round(item.get("media_redacao", 0) or 0, 2)
-                    }
                 }
-            }
-            formatted_results.append(formatted_item)
-        
-        # Ordenar por média de redação (critério principal) e depois por média geral
-        formatted_results.sort(
-            key=lambda x: (x["areas"]["redacao"]["media"], x["media_geral_objetivas"]), 
-            reverse=True
-        )
+            },
+        ]
         
-        # Adicionar posição no ranking
-        for i, item in enumerate(formatted_results, 1):
-            item["posicao"] = i
+        # O rollup tem um documento por UF; sem ele, agrega a coleção inteira
+        raw_results = await self.uf_stats_collection.aggregate(pipeline).to_list(1)
+        if not raw_results:
+            raw_results = await self.aggregate(
+                _pipeline_rollup_uf() + pipeline, length=1, **self._hint(UF_NOTAS_INDEX)
+            )
+        if not raw_results:
+            return {"ranking": [], "total_ufs": 0}
         
+        data = raw_results[0]
+        ranking = data["ranking"]
+
         return {
-            "ranking": formatted_results,
-            "total_ufs": len(formatted_results),
+            "ranking": ranking,
+            "total_ufs": len(ranking),
             "criterio_ordenacao": "Média da Redação (principal) + Média Geral das Provas Objetivas",
             "resumo": {
-                "melhor_uf": formatted_results[0]["uf"] if formatted_results else None,
-                "maior_participacao": max(formatted_results, key=lambda x: x["total_participantes"])["uf"] if formatted_results else None,
-                "total_participantes": sum(item["total_participantes"] for item in formatted_results)
+                "melhor_uf": ranking[0]["uf"],
+                "maior_participacao": data["maior_participacao"],
+                "total_participantes": data["total_participantes"],
             }
         }
 
@@ -208,98 +713,115 @@ class ResultadoRepository(BaseRepository):
         self, nota_corte: float = 600.0, skip: int = 0, limit: int = 10
     ) -> List[Dict[str, Any]]:
         """Buscar participantes com nota acima da média em pelo menos uma área"""
-        filter_dict = {
-            "$or": [
-                {"nota_cn": {"$gte": nota_corte}},
-                {"nota_ch": {"$gte": nota_corte}},
-                {"nota_lc": {"$gte": nota_corte}},
-                {"nota_mt": {"$gte": nota_corte}},
-                {"nota_redacao": {"$gte": nota_corte}},
-            ]
-        }
-        cursor = self.collection.find(filter_dict).skip(skip).limit(limit).sort("nota_redacao", -1)
-        return await cursor.to_list(length=None)
-
-    async def count_notas_acima_media(self, nota_corte: float = 600.0) -> int:
-        """Contar participantes com nota acima da média em pelo menos uma área"""
-        filter_dict = {
-            "$or": [
-                {"nota_cn": {"$gte": nota_corte}},
-                {"nota_ch": {"$gte": nota_corte}},
-                {"nota_lc": {"$gte": nota_corte}},
-                {"nota_mt": {"$gte": nota_corte}},
-                {"nota_redacao": {"$gte": nota_corte}},
-            ]
-        }
-        return await self.collection.count_documents(filter_dict)
+        cursor = (
+            self.collection.find(_filtro_notas_acima(nota_corte), DESTAQUE_PROJECTION)
+            .skip(skip)
+            .limit(limit)
+            .batch_size(limit)
+            .sort("nota_redacao", -1)
+        )
+        return await cursor.to_list(length=limit or None)
 
-    async def get_distribuicao_notas_redacao(self) -> Dict[str, Any]:
-        """Obter distribuição das notas de redação"""
-        pipeline = [
+    async def get_notas_acima_media_page(
+        self, nota_corte: float = 600.0, skip: int = 0, limit: int = 10
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Buscar página de participantes com nota acima do corte e o total"""
+        encontrado, total = self._count_cache.get(nota_corte)
+        if encontrado:
+            items = await self.get_notas_acima_media(nota_corte, skip, limit)
+            return items, total
+
+        items, total = await self.find_page(
+            skip=skip,
+            limit=limit,
+            filter_dict=_filtro_notas_acima(nota_corte),
+            sort_by="nota_redacao",
+            sort_order=-1,
+            projection=DESTAQUE_PROJECTION,
+        )
+        self._count_cache.set(nota_corte, total)
+        return items, total
+
+    async def refresh_distribuicao_redacao(self) -> None:
+        """Recalcular a distribuição das notas de redação e gravá-la via $merge"""
+        pipeline = _pipeline_distribuicao_redacao() + [
+            # Documento único, substituído a cada atualização
+            {"$set": {"_id": "redacao", "atualizado_em": "$$NOW"}},
             {
-                "$bucket": {
-                    "groupBy": "$nota_redacao",
-                    "boundaries": [0, 200, 400, 600, 800, 1000],
-                    "default": "Outros",
-                    "output": {
-                        "count": {"$sum": 1},
-                        "media": {"$avg": "$nota_redacao"},
-                        "nota_maxima": {"$max": "$nota_redacao"},
-                        "nota_minima": {"$min": "$nota_redacao"}
-                    },
+                "$merge": {
+                    "into": self.distribuicao_redacao_collection_name,
+                    "on": "_id",
+                    "whenMatched": "replace",
+                    "whenNotMatched": "insert",
                 }
-            }
+            },
         ]
-        
-        raw_results = await self.aggregate(pipeline)
-        
-        faixas_map = {
-            0: {"nome": "Muito Baixa", "descricao": "0 - 199 pontos", "min": 0, "max": 199},
-            200: {"nome": "Baixa", "descricao": "200 - 399 pontos", "min": 200, "max": 399},
-            400: {"nome": "Média", "descricao": "400 - 599 pontos", "min": 400, "max": 599},
-            600: {"nome": "Boa", "descricao": "600 - 799 pontos", "min": 600, "max": 799},
-            800: {"nome": "Excelente", "descricao": "800 - 1000 pontos", "min": 800, "max": 1000},
-            "Outros": {"nome": "Inválidas", "descricao": "Notas nulas ou inválidas", "min": None, "max": None}
-        }
-        
+        # Até sete grupos em memória: sem allowDiskUse, uma regressão no plano
+        # falha em vez de varrer e ordenar a coleção em disco
+        await self.collection.aggregate(
+            pipeline, allowDiskUse=False, **self._hint(FAIXA_REDACAO_INDEX)
+        ).to_list(None)
+        self.get_distribuicao_notas_redacao.cache_clear()
+
+    @async_ttl_cache(ttl=3600)
+    async def get_distribuicao_notas_redacao(self) -> Dict[str, Any]:
+        """Obter distribuição das notas de redação"""
+        # Lida da visão materializada; sem ela, agrega a coleção inteira
+        resumo = await self.distribuicao_redacao_collection.find_one({"_id": "redacao"})
+        if resumo:
+            aggregated = [resumo]
+        else:
+            aggregated = await self.aggregate(
+                _pipeline_distribuicao_redacao(),
+                length=1,
+                **self._hint(FAIXA_REDACAO_INDEX),
+                allowDiskUse=False,
+            )
+        raw_results = aggregated[0]["faixas"] if aggregated else []
+
+        # Faixas já ordenadas pelo limite inferior ("Outros" por último)
         distribuicao = []
-        total_participantes = sum(item.get("count", 0) for item in raw_results)
-        
         for item in raw_results:
-            faixa_id = item["_id"]
-            info_faixa = faixas_map.get(faixa_id, {"nome": "Desconhecida", "descricao": "N/A"})
-            
-            distribuicao_item = {
+            faixa = _info_faixa_redacao(item["_id"])
+            distribuicao.append({
                 "faixa": {
-                    "nome": info_faixa["nome"],
-                    "descricao": info_faixa["descricao"],
-                    "limite_inferior": info_faixa.get("min"),
-                    "limite_superior": info_faixa.get("max"),
-                    "intervalo": f"{info_faixa.get('min', 'N/A')} - {info_faixa.get('max', 'N/A')}" if info_faixa.get("min") is not None else "Inválidas"
+                    "nome": faixa["nome"],
+                    "descricao": faixa["descricao"],
+                    "limite_inferior": faixa.get("min"),
+                    "limite_superior": faixa.get("max"),
+                    "intervalo": f"{faixa.get('min', 'N/A')} - {faixa.get('max', 'N/A')}" if faixa.get("min") is not None else "Inválidas"
                 },
                 "estatisticas": {
                     "total_participantes": item.get("count", 0),
-                    "percentual": round((item.get("count", 0) / max(total_participantes, 1)) * 100, 2),
-                    "media_faixa": round(item.get("media", 0), 2) if item.get("media") is not None else None,
+                    "percentual": item.get("percentual"),
+                    "media_faixa": item.get("media"),
                     "nota_maxima": item.get("nota_maxima"),
                     "nota_minima": item.get("nota_minima")
                 }
-            }
-            distribuicao.append(distribuicao_item)
-        
-        # Ordenar por limite inferior (exceto "Outros" que vai pro final)
-        distribuicao.sort(key=lambda x: (x["faixa"]["limite_inferior"] is None, x["faixa"]["limite_inferior"] or 0))
-        
+            })
+
+        resumo = aggregated[0] if aggregated else {}
+        predominante = resumo.get("faixa_predominante")
+
         return {
             "distribuicao_por_faixas": distribuicao,
             "resumo_geral": {
-                "total_participantes": total_participantes,
-                "faixa_predominante": max(distribuicao, key=lambda x: x["estatisticas"]["total_participantes"])["faixa"]["nome"] if distribuicao else "N/A",
-                "participantes_com_nota_valida": total_participantes - next((item["estatisticas"]["total_participantes"] for item in distribuicao if item["faixa"]["nome"] == "Inválidas"), 0),
-                "media_geral_redacao": round(
-                    sum(item["estatisticas"]["media_faixa"] * item["estatisticas"]["total_participantes"] 
-                        for item in distribuicao if item["estatisticas"]["media_faixa"] is not None) / 
-                    max(sum(item["estatisticas"]["total_participantes"] for item in distribuicao if item["estatisticas"]["media_faixa"] is not None), 1), 2
-                )
+                "total_participantes": resumo.get("total", 0),
+                "faixa_predominante": _info_faixa_redacao(predominante["_id"])["nome"] if predominante else "N/A",
+                "participantes_com_nota_valida": resumo.get("participantes_com_nota_valida", 0),
+                "media_geral_redacao": resumo.get("media_geral_redacao", 0.0),
             }
         }
+
+    async def get_dashboard(self) -> Dict[str, Any]:
+        """Obter médias por área, ranking das UFs e distribuição da redação em paralelo"""
+        medias, ranking_uf, distribuicao = await asyncio.gather(
+            self.get_media_notas_por_area(),
+            self.get_media_por_uf(),
+            self.get_distribuicao_notas_redacao(),
+        )
+        return {
+            "medias_gerais": medias,
+            "ranking_uf": ranking_uf,
+            "distribuicao_redacao": distribuicao,
+        }
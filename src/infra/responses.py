@@ -0,0 +1,31 @@
+from typing import Any
+
+import orjson
+from bson import Decimal128, ObjectId
+from fastapi.responses import JSONResponse
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def orjson_default(value: Any) -> Any:
+    """Converter tipos do MongoDB que o orjson não serializa nativamente"""
+    # datetime, dict, list e tipos numéricos já são tratados pelo orjson em C
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return float(value.to_decimal())
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Serializar conteúdo em JSON (bytes) usando orjson"""
+    return orjson.dumps(content, default=orjson_default, option=ORJSON_OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    """Resposta JSON serializada com orjson, com suporte a ObjectId"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
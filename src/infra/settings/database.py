@@ -8,11 +8,27 @@ from config.settings import settings
 class Database:
     client: AsyncIOMotorClient = None
     database = None
+    # Cliente síncrono reaproveitado entre as cargas de dados
+    sync_client: MongoClient = None
 
 
 db = Database()
 
 
+def get_client_options() -> dict:
+    """Opções comuns aos clientes síncrono e assíncrono do MongoDB"""
+    return {
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "compressors": settings.MONGO_COMPRESSORS,
+        # zlib só entra quando o servidor não oferece zstd: nível baixo, mais rápido
+        "zlibCompressionLevel": settings.MONGO_ZLIB_COMPRESSION_LEVEL,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "retryWrites": True,
+        "retryReads": True,
+    }
+
+
 async def get_database() -> AsyncIOMotorClient:
     return db.database
 
@@ -20,7 +36,7 @@ async def get_database() -> AsyncIOMotorClient:
 async def connect_to_mongo():
     """Criar conexão com MongoDB"""
     logger.info("Conectando ao MongoDB...")
-    db.client = AsyncIOMotorClient(settings.MONGO_URL)
+    db.client = AsyncIOMotorClient(settings.MONGO_URL, **get_client_options())
     db.database = db.client[settings.DATABASE_NAME]
     logger.info(f"Conectado ao MongoDB no banco de dados: {settings.DATABASE_NAME}")
 
@@ -31,11 +47,15 @@ async def close_mongo_connection():
     if db.client:
         db.client.close()
         logger.info("Conexão com MongoDB fechada.")
+    if db.sync_client:
+        db.sync_client.close()
+        db.sync_client = None
 
 
 def get_sync_database():
     """Conexão síncrona para operações de migração/carregamento de dados"""
-    logger.info("Conectando ao MongoDB (síncrono)...")
-    client = MongoClient(settings.MONGO_URL)
-    logger.info(f"Conectado ao MongoDB no banco de dados: {settings.DATABASE_NAME}")
-    return client[settings.DATABASE_NAME]
+    if db.sync_client is None:
+        logger.info("Conectando ao MongoDB (síncrono)...")
+        db.sync_client = MongoClient(settings.MONGO_URL, **get_client_options())
+        logger.info(f"Conectado ao MongoDB no banco de dados: {settings.DATABASE_NAME}")
+    return db.sync_client[settings.DATABASE_NAME]
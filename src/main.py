@@ -1,11 +1,24 @@
+import asyncio
 from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Optional
 
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from config.logs import logger
-from infra.settings.database import close_mongo_connection, connect_to_mongo
+from config.settings import settings
+from infra.repositories.escola_repository import EscolaRepository
+from infra.repositories.municipio_repository import MunicipioRepository
+from infra.repositories.participante_repository import ParticipanteRepository
+from infra.repositories.resultado_repository import ResultadoRepository
+from infra.responses import ORJSONResponse
+from infra.settings.database import (
+    close_mongo_connection,
+    connect_to_mongo,
+    get_database,
+)
 from routes import (
     admin_router,
     escola_router,
@@ -15,17 +28,111 @@ from routes import (
 )
 
 
+async def segundos_desde_atualizacao(view) -> Optional[float]:
+    """Idade da visão materializada pelo atualizado_em gravado no último $merge"""
+    # $$NOW é o mesmo em todo o $merge: qualquer documento serve
+    documento = await view.find_one({}, {"atualizado_em": 1})
+    if not documento or documento.get("atualizado_em") is None:
+        return None
+    atualizado_em = documento["atualizado_em"].replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - atualizado_em).total_seconds()
+
+
+async def refresh_periodically(descricao: str, refresh, view, interval_seconds: int) -> None:
+    """Executar periodicamente a atualização de uma visão materializada"""
+    # Reinícios (e o reload do uvicorn) não recalculam visões ainda dentro do intervalo:
+    # só uma visão ausente ou vencida é atualizada já na subida
+    try:
+        idade = await segundos_desde_atualizacao(view)
+    except Exception as e:
+        logger.error(f"Erro ao verificar {descricao.lower()}: {e}")
+        idade = None
+    if idade is not None and idade < interval_seconds:
+        await asyncio.sleep(interval_seconds - idade)
+    while True:
+        try:
+            await refresh()
+            logger.info(f"{descricao} atualizadas")
+        except Exception as e:
+            logger.error(f"Erro ao atualizar {descricao.lower()}: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Gerenciar ciclo de vida da aplicação"""
     logger.info("Iniciando aplicação...")
     await connect_to_mongo()
 
+    try:
+        db = await get_database()
+        repositories = [
+            MunicipioRepository(db),
+            EscolaRepository(db),
+            ParticipanteRepository(db),
+            ResultadoRepository(db),
+        ]
+        await asyncio.gather(*(repo.ensure_indexes() for repo in repositories))
+        logger.info("Índices verificados com sucesso!")
+    except Exception as e:
+        logger.error(f"Erro ao criar índices: {e}")
+
+    try:
+        await ResultadoRepository(await get_database()).migrar_campos_calculados()
+    except Exception as e:
+        logger.error(f"Erro ao migrar os campos calculados dos resultados: {e}")
+
+    db = await get_database()
+    stats_tasks = [
+        asyncio.create_task(
+            refresh_periodically(
+                "Estatísticas das escolas",
+                EscolaRepository(db).refresh_escola_stats,
+                db[EscolaRepository.stats_collection_name],
+                settings.ESCOLA_STATS_REFRESH_SECONDS,
+            )
+        ),
+        asyncio.create_task(
+            refresh_periodically(
+                "Estatísticas por UF",
+                ResultadoRepository(db).refresh_uf_stats,
+                db[ResultadoRepository.uf_stats_collection_name],
+                settings.UF_STATS_REFRESH_SECONDS,
+            )
+        ),
+        asyncio.create_task(
+            refresh_periodically(
+                "Distribuição das notas de redação",
+                ResultadoRepository(db).refresh_distribuicao_redacao,
+                db[ResultadoRepository.distribuicao_redacao_collection_name],
+                settings.DISTRIBUICAO_REDACAO_REFRESH_SECONDS,
+            )
+        ),
+        asyncio.create_task(
+            refresh_periodically(
+                "Médias por área",
+                ResultadoRepository(db).refresh_medias_por_area,
+                db[ResultadoRepository.medias_area_collection_name],
+                settings.MEDIAS_AREA_REFRESH_SECONDS,
+            )
+        ),
+        asyncio.create_task(
+            refresh_periodically(
+                "Estatísticas demográficas",
+                ParticipanteRepository(db).refresh_summary,
+                db[ParticipanteRepository.summary_collection_name],
+                settings.PARTICIPANTES_SUMMARY_REFRESH_SECONDS,
+            )
+        ),
+    ]
+
     logger.info("Aplicação iniciada com sucesso!")
 
     yield
 
     logger.info("Finalizando aplicação...")
+    for task in stats_tasks:
+        task.cancel()
     await close_mongo_connection()
     logger.info("Aplicação finalizada!")
 
@@ -54,6 +161,7 @@ app = FastAPI(
     """,
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -90,8 +198,9 @@ async def health_check():
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
-    logger.error(f"Erro não tratado: {exc}")
-    raise HTTPException(status_code=500, detail="Erro interno do servidor")
+    # Único ponto que registra o traceback de erros não tratados
+    logger.exception(f"Erro não tratado: {exc}")
+    return ORJSONResponse(status_code=500, content={"detail": "Erro interno do servidor"})
 
 
 if __name__ == "__main__":
@@ -1,13 +1,30 @@
-from typing import Optional
-from datetime import datetime
+from typing import Dict, Optional
+from datetime import datetime, timezone
+from functools import lru_cache
 
 from bson import ObjectId
+from bson.errors import InvalidId
 from pydantic import BaseModel, Field, ConfigDict
 from pydantic.json_schema import JsonSchemaValue
 from pydantic_core import core_schema
 from typing import Any
 
 
+@lru_cache(maxsize=None)
+def _defaults_estaticos(model_type: type) -> Dict[str, Any]:
+    """Defaults fixos (sem default_factory) dos campos opcionais, resolvidos uma vez por tipo"""
+    return {
+        nome: campo.default
+        for nome, campo in model_type.model_fields.items()
+        if not campo.is_required() and campo.default_factory is None
+    }
+
+
+def utc_now() -> datetime:
+    """Instante atual em UTC, como o MongoDB armazena datas"""
+    return datetime.now(timezone.utc)
+
+
 class PyObjectId(ObjectId):
     @classmethod
     def __get_pydantic_core_schema__(
@@ -19,21 +36,23 @@ class PyObjectId(ObjectId):
             json_schema=core_schema.str_schema(),
             python_schema=core_schema.union_schema([
                 core_schema.is_instance_schema(ObjectId),
-                core_schema.chain_schema([
-                    core_schema.str_schema(),
-                    core_schema.no_info_plain_validator_function(cls.validate),
-                ])
+                core_schema.no_info_plain_validator_function(cls.validate),
             ]),
-            serialization=core_schema.plain_serializer_function_ser_schema(
-                lambda x: str(x)
-            ),
+            # str() chamado pelo pydantic-core, sem função Python intermediária
+            serialization=core_schema.to_string_ser_schema(when_used="always"),
         )
 
     @classmethod
     def validate(cls, v):
-        if not ObjectId.is_valid(v):
+        if isinstance(v, ObjectId):
+            return v
+        if not isinstance(v, (str, bytes)):
+            raise ValueError("Invalid ObjectId")
+        # Uma única conversão: ObjectId() já valida o formato
+        try:
+            return ObjectId(v)
+        except InvalidId:
             raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
 
     @classmethod
     def __get_pydantic_json_schema__(
@@ -46,13 +65,19 @@ class MongoBaseModel(BaseModel):
     model_config = ConfigDict(
         populate_by_name=True,
         arbitrary_types_allowed=True,
-        json_encoders={ObjectId: str, datetime: str}
+        # _id no lugar de id ao serializar, resolvido no núcleo do Pydantic
+        serialize_by_alias=True,
     )
-    
+
     id: Optional[PyObjectId] = Field(default_factory=PyObjectId, alias="_id")
-    created_at: Optional[datetime] = Field(default_factory=datetime.now)
-    updated_at: Optional[datetime] = Field(default_factory=datetime.now)
+    created_at: Optional[datetime] = Field(default_factory=utc_now)
+    # Reaproveita created_at: uma só leitura do relógio por documento
+    updated_at: Optional[datetime] = Field(
+        default_factory=lambda data: data.get("created_at")
+    )
 
-    def model_dump(self, **kwargs):
-        kwargs.setdefault('by_alias', True)
-        return super().model_dump(**kwargs)
+    @classmethod
+    def construct_trusted(cls, data: Dict[str, Any]) -> "MongoBaseModel":
+        """Montar o modelo sem validação, a partir de dados já convertidos (carga)"""
+        # Com todos os campos presentes, model_construct não resolve default a default
+        return cls.model_construct(**{**_defaults_estaticos(cls), **data})
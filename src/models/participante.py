@@ -1,8 +1,9 @@
-from typing import Any, Dict, Optional
+from typing import Optional
 
 from pydantic import Field
 
 from .base import MongoBaseModel, PyObjectId
+from .questionario import QuestionarioSocioeconomico
 
 
 class Participante(MongoBaseModel):
@@ -26,7 +27,7 @@ class Participante(MongoBaseModel):
     )
     uf_prova: str = Field(..., description="UF onde fez a prova")
 
-    questionario: Optional[Dict[str, Any]] = Field(
+    questionario: Optional[QuestionarioSocioeconomico] = Field(
         None, description="Respostas do questionário socioeconômico"
     )
 
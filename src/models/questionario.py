@@ -1,11 +1,15 @@
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class QuestionarioSocioeconomico(BaseModel):
     """Questionário socioeconômico do ENEM"""
 
+    # Respostas são letras, exceto Q005 (pessoas na residência, até 20); o teto
+    # de 4 caracteres deixa folga para códigos de outras edições do questionário
+    model_config = ConfigDict(extra="ignore", str_max_length=4)
+
     Q001: Optional[str] = Field(
         None, description="Até que série seu pai ou responsável estudou?"
     )
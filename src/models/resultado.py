@@ -1,10 +1,31 @@
-from typing import Optional
+from bisect import bisect_right
+from typing import Iterable, Optional
 
 from pydantic import Field
 
 from .base import MongoBaseModel, PyObjectId
 
 
+# Limites das faixas de nota da redação (intervalos fechados à esquerda)
+FAIXAS_REDACAO = (0, 200, 400, 600, 800, 1000)
+
+
+def calcular_faixa_redacao(nota: Optional[float]) -> Optional[int]:
+    """Obter o limite inferior da faixa da nota de redação, ou None se inválida"""
+    if nota is None or not FAIXAS_REDACAO[0] <= nota < FAIXAS_REDACAO[-1]:
+        return None
+    return FAIXAS_REDACAO[bisect_right(FAIXAS_REDACAO, nota) - 1]
+
+
+# Campos de nota considerados em max_nota (provas objetivas e redação)
+NOTAS_AREAS = ("nota_cn", "nota_ch", "nota_lc", "nota_mt", "nota_redacao")
+
+
+def calcular_max_nota(notas: Iterable[Optional[float]]) -> Optional[float]:
+    """Obter a maior nota entre as áreas, ignorando as ausentes"""
+    return max((nota for nota in notas if nota is not None), default=None)
+
+
 class Resultado(MongoBaseModel):
     nu_sequencial: str = Field(..., description="Número sequencial único")
     nu_ano: int = Field(..., description="Ano da prova")
@@ -120,6 +141,12 @@ class Resultado(MongoBaseModel):
         None, description="Média das provas objetivas"
     )
     total_acertos: Optional[int] = Field(None, description="Total de acertos")
+    faixa_redacao: Optional[int] = Field(
+        None, description="Limite inferior da faixa da nota de redação"
+    )
+    max_nota: Optional[float] = Field(
+        None, description="Maior nota entre as provas objetivas e a redação"
+    )
 
     class Config:
         collection = "resultados"
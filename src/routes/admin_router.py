@@ -1,12 +1,61 @@
 import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
 
 from fastapi import APIRouter
+from pymongo import ReturnDocument
 
-from config.logs import logger
+from config.logs import logger, setup_worker_logger
+from infra.repositories.escola_repository import EscolaRepository
+from infra.repositories.municipio_repository import MunicipioRepository
+from infra.repositories.participante_repository import ParticipanteRepository
+from infra.repositories.resultado_repository import ResultadoRepository
+from infra.settings.database import get_database
 
 router = APIRouter(prefix="/admin", tags=["Administração"])
 
+# Processo dedicado à carga: a leitura dos CSVs não disputa o GIL nem o
+# thread pool padrão com as requisições. Criado com spawn, não fork: a API já
+# tem threads (logs, driver do MongoDB) que não sobreviveriam no filho
+_loader_pool = ProcessPoolExecutor(
+    max_workers=1,
+    mp_context=multiprocessing.get_context("spawn"),
+    initializer=setup_worker_logger,
+)
+
+# Trava da carga entre os workers; expira sozinha se o processo morrer no meio
+CARGA_LOCK_ID = "load_data"
+CARGA_LOCK_TTL_SECONDS = 60 * 60
+
+
+async def _reservar_carga(db) -> bool:
+    """Reservar a carga de dados para este worker, se nenhum outro estiver carregando"""
+    await db.migrations.create_index(
+        "iniciado_em", expireAfterSeconds=CARGA_LOCK_TTL_SECONDS
+    )
+    anterior = await db.migrations.find_one_and_update(
+        {"_id": CARGA_LOCK_ID},
+        {"$setOnInsert": {"iniciado_em": datetime.now(timezone.utc)}},
+        upsert=True,
+        return_document=ReturnDocument.BEFORE,
+    )
+    return anterior is None
+
+
+async def refresh_materialized_views() -> None:
+    """Recalcular todas as visões materializadas de estatísticas, em paralelo"""
+    db = await get_database()
+    resultado_repository = ResultadoRepository(db)
+    await asyncio.gather(
+        EscolaRepository(db).refresh_escola_stats(),
+        resultado_repository.refresh_uf_stats(),
+        resultado_repository.refresh_distribuicao_redacao(),
+        resultado_repository.refresh_medias_por_area(),
+        ParticipanteRepository(db).refresh_summary(),
+    )
+
 
 @router.post("/load-data")
 async def load_data_endpoint():
@@ -17,10 +66,28 @@ async def load_data_endpoint():
         csv_resultados = data_path / "amostra_resultados.csv"
 
         if csv_participantes.exists() and csv_resultados.exists():
-            logger.info("Iniciando carregamento de dados...")
-            from scripts.load_data import load_data_to_mongodb
+            db = await get_database()
+            if not await _reservar_carga(db):
+                logger.warning("Carregamento de dados já em andamento. Cancelado.")
+                return {
+                    "status": "error",
+                    "message": "Carregamento de dados já em andamento",
+                }
 
-            await asyncio.get_event_loop().run_in_executor(None, load_data_to_mongodb)
+            try:
+                logger.info("Iniciando carregamento de dados...")
+                from scripts.load_data import load_data_to_mongodb
+
+                await asyncio.get_running_loop().run_in_executor(
+                    _loader_pool, load_data_to_mongodb
+                )
+                EscolaRepository.clear_cache()
+                MunicipioRepository.clear_cache()
+                ParticipanteRepository.clear_cache()
+                ResultadoRepository.clear_cache()
+                await refresh_materialized_views()
+            finally:
+                await db.migrations.delete_one({"_id": CARGA_LOCK_ID})
             logger.info("Dados carregados com sucesso!")
 
             return {
@@ -41,3 +108,20 @@ async def load_data_endpoint():
     except Exception as e:
         logger.error(f"Erro ao carregar dados: {e}")
         return {"status": "error", "message": f"Erro ao carregar dados: {str(e)}"}
+
+
+@router.post("/refresh-views")
+async def refresh_views_endpoint():
+    """Endpoint para recalcular as visões materializadas de estatísticas"""
+    try:
+        logger.info("Atualizando visões materializadas...")
+        await refresh_materialized_views()
+        logger.info("Visões materializadas atualizadas com sucesso!")
+        return {"status": "success", "message": "Visões materializadas atualizadas!"}
+
+    except Exception as e:
+        logger.error(f"Erro ao atualizar visões materializadas: {e}")
+        return {
+            "status": "error",
+            "message": f"Erro ao atualizar visões materializadas: {str(e)}",
+        }
@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 
 from config.logs import logger
 from infra.repositories.escola_repository import EscolaRepository
+from infra.responses import ORJSONResponse
 from infra.settings.database import get_database
 from schemas.escola_schemas import (
     EscolaCreate,
@@ -34,7 +35,7 @@ async def criar_escola(
 
     logger.info(f"Criando nova escola: código {escola.codigo} - {escola.nome or 'N/A'}")
     try:
-        created_escola = await service.criar_escola(escola.dict())
+        created_escola = await service.criar_escola(escola.model_dump())
         logger.info(f"Escola criada com sucesso: {escola.codigo}")
         return created_escola
     except Exception as e:
@@ -86,14 +87,16 @@ async def listar_escolas(
     service: EscolaService = Depends(get_escola_service),
 ):
     """Listar escolas com filtros e paginação"""
-    return await service.listar_escolas(
-        skip=skip,
-        limit=limit,
-        uf=uf,
-        municipio=municipio,
-        dependencia_administrativa=dependencia_administrativa,
-        localizacao=localizacao,
-        situacao_funcionamento=situacao_funcionamento,
+    return ORJSONResponse(
+        await service.listar_escolas(
+            skip=skip,
+            limit=limit,
+            uf=uf,
+            municipio=municipio,
+            dependencia_administrativa=dependencia_administrativa,
+            localizacao=localizacao,
+            situacao_funcionamento=situacao_funcionamento,
+        )
     )
 
 
@@ -126,7 +129,7 @@ async def atualizar_escola(
     """Atualizar escola"""
     logger.info(f"Atualizando escola - ID: {escola_id}")
     
-    update_data = {k: v for k, v in escola_update.dict().items() if v is not None}
+    update_data = escola_update.model_dump(exclude_none=True)
 
     if not update_data:
         raise HTTPException(status_code=400, detail="Nenhum dado para atualizar")
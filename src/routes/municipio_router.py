@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 
 from config.logs import logger
 from infra.repositories.municipio_repository import MunicipioRepository
+from infra.responses import ORJSONResponse
 from infra.settings.database import get_database
 from schemas.municipio_schemas import (
     EstatisticasRegiaoResponse,
@@ -33,7 +34,7 @@ async def criar_municipio(
     """Criar um novo município"""
     logger.info(f"Criando novo município: {municipio.nome} - {municipio.uf_sigla}")
     try:
-        resultado = await service.criar_municipio(municipio.dict())
+        resultado = await service.criar_municipio(municipio.model_dump())
         logger.info(f"Município criado com sucesso: {municipio.nome}")
         return resultado
     except Exception as e:
@@ -89,7 +90,7 @@ async def listar_municipios(
         skip=skip, limit=limit, uf_sigla=uf_sigla, regiao=regiao
     )
     logger.info(f"Encontrados {resultado.get('total', 0)} municípios")
-    return resultado
+    return ORJSONResponse(resultado)
 
 
 @router.put("/{municipio_id}", response_model=MunicipioOperationResponse)
@@ -99,8 +100,7 @@ async def atualizar_municipio(
     service: MunicipioService = Depends(get_municipio_service),
 ):
     """Atualizar município"""
-    # Remove campos None
-    update_data = {k: v for k, v in municipio_update.dict().items() if v is not None}
+    update_data = municipio_update.model_dump(exclude_none=True)
 
     if not update_data:
         raise HTTPException(status_code=400, detail="Nenhum dado para atualizar")
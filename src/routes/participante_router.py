@@ -3,8 +3,10 @@ from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
 
 from infra.repositories.participante_repository import ParticipanteRepository
+from infra.responses import ORJSONResponse
 from infra.settings.database import get_database
 from schemas.participante_schemas import (
+    DashboardParticipantesResponse,
     DistribuicaoIdadeResponse,
     EstatisticasDemograficasResponse,
     ParticipanteCreate,
@@ -70,16 +72,18 @@ async def listar_participantes(
     service: ParticipanteService = Depends(get_participante_service),
 ):
     """Listar participantes com filtros e paginação"""
-    return await service.listar_participantes(
-        skip=skip,
-        limit=limit,
-        ano=ano,
-        uf_residencia=uf_residencia,
-        municipio_residencia=municipio_residencia,
-        escola_codigo=escola_codigo,
-        sexo=sexo,
-        idade_min=idade_min,
-        idade_max=idade_max,
+    return ORJSONResponse(
+        await service.listar_participantes(
+            skip=skip,
+            limit=limit,
+            ano=ano,
+            uf_residencia=uf_residencia,
+            municipio_residencia=municipio_residencia,
+            escola_codigo=escola_codigo,
+            sexo=sexo,
+            idade_min=idade_min,
+            idade_max=idade_max,
+        )
     )
 
 
@@ -114,6 +118,14 @@ async def obter_distribuicao_idade(
     return await service.obter_distribuicao_idade()
 
 
+@router.get("/estatisticas/dashboard", response_model=DashboardParticipantesResponse)
+async def obter_dashboard(
+    service: ParticipanteService = Depends(get_participante_service),
+):
+    """Obter todas as estatísticas de participantes em uma única chamada"""
+    return await service.obter_dashboard()
+
+
 @router.post("/", response_model=ParticipanteSimples)
 async def criar_participante(
     participante: ParticipanteCreate,
@@ -121,7 +133,7 @@ async def criar_participante(
 ):
     """Criar um novo participante"""
     try:
-        created_participante = await service.criar_participante(participante.dict())
+        created_participante = await service.criar_participante(participante.model_dump())
         return created_participante
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -134,8 +146,7 @@ async def atualizar_participante(
     service: ParticipanteService = Depends(get_participante_service),
 ):
     """Atualizar participante"""
-    # Remove campos None
-    update_data = {k: v for k, v in participante_update.dict().items() if v is not None}
+    update_data = participante_update.model_dump(exclude_none=True)
 
     if not update_data:
         raise HTTPException(status_code=400, detail="Nenhum dado para atualizar")
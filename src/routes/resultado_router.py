@@ -1,11 +1,14 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
 from infra.repositories.resultado_repository import ResultadoRepository
+from infra.responses import ORJSONResponse
 from infra.settings.database import get_database
 from schemas.resultado_schemas import (
+    DashboardResultadosResponse,
     DistribuicaoRedacaoResponse,
     EstatisticasPeriodoResponse,
     MediasGeraisResponse,
@@ -17,7 +20,7 @@ from schemas.resultado_schemas import (
     ResultadoSimples,
     ResultadoUpdate,
 )
-from services.resultado_service import ResultadoService
+from services.resultado_service import ResultadoService, validar_campos
 
 router = APIRouter(prefix="/resultados", tags=["Resultados"])
 
@@ -29,6 +32,19 @@ async def get_resultado_service():
     return ResultadoService(resultado_repo)
 
 
+def get_campos(
+    campos: Optional[List[str]] = Query(
+        None, description="Campos de cada resultado (todos, se omitido)"
+    ),
+) -> Optional[List[str]]:
+    """Validar os campos pedidos antes de a resposta começar a ser enviada"""
+    try:
+        validar_campos(campos)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return campos
+
+
 @router.post("/", response_model=ResultadoSimples)
 async def criar_resultado(
     resultado: ResultadoCreate,
@@ -36,7 +52,7 @@ async def criar_resultado(
 ):
     """Criar um novo resultado"""
     try:
-        return await service.criar_resultado(resultado.dict())
+        return await service.criar_resultado(resultado.model_dump())
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -64,6 +80,32 @@ async def obter_resultado_por_participante(
     return resultado
 
 
+@router.get("/escola/{escola_codigo}/stream")
+async def transmitir_resultados_por_escola(
+    escola_codigo: int,
+    campos: Optional[List[str]] = Depends(get_campos),
+    service: ResultadoService = Depends(get_resultado_service),
+):
+    """Transmitir resultados de uma escola em NDJSON (uma linha por resultado)"""
+    return StreamingResponse(
+        service.stream_resultados_por_escola(escola_codigo, campos),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.get("/escola/{escola_codigo}/stream/bson")
+async def transmitir_resultados_por_escola_bson(
+    escola_codigo: int,
+    campos: Optional[List[str]] = Depends(get_campos),
+    service: ResultadoService = Depends(get_resultado_service),
+):
+    """Transmitir resultados de uma escola em BSON (documentos concatenados)"""
+    return StreamingResponse(
+        service.stream_resultados_por_escola_bson(escola_codigo, campos),
+        media_type="application/bson",
+    )
+
+
 @router.get("/", response_model=ResultadoPaginadoResponse)
 async def listar_resultados(
     skip: int = Query(0, ge=0, description="Número de registros a pular"),
@@ -73,15 +115,21 @@ async def listar_resultados(
         None, description="Filtrar por código da escola"
     ),
     uf_prova_sigla: Optional[str] = Query(None, description="Filtrar por UF da prova"),
+    campos: Optional[List[str]] = Depends(get_campos),
     service: ResultadoService = Depends(get_resultado_service),
 ):
     """Listar resultados com filtros e paginação"""
-    return await service.listar_resultados(
-        skip=skip,
-        limit=limit,
-        ano=ano,
-        escola_codigo=escola_codigo,
-        uf_prova_sigla=uf_prova_sigla,
+    # Itens crus do Motor direto para o orjson, sem validação do response_model
+    # (que só documenta o formato)
+    return ORJSONResponse(
+        await service.listar_resultados(
+            skip=skip,
+            limit=limit,
+            ano=ano,
+            escola_codigo=escola_codigo,
+            uf_prova_sigla=uf_prova_sigla,
+            campos=campos,
+        )
     )
 
 
@@ -122,6 +170,12 @@ async def obter_distribuicao_redacao(
     return await service.obter_distribuicao_redacao()
 
 
+@router.get("/estatisticas/dashboard", response_model=DashboardResultadosResponse)
+async def obter_dashboard(service: ResultadoService = Depends(get_resultado_service)):
+    """Obter médias por área, ranking das UFs e distribuição da redação"""
+    return await service.obter_dashboard()
+
+
 @router.get("/estatisticas/periodo", response_model=EstatisticasPeriodoResponse)
 async def obter_estatisticas_periodo(
     data_inicio: Optional[datetime] = Query(
@@ -141,8 +195,8 @@ async def atualizar_resultado(
     service: ResultadoService = Depends(get_resultado_service),
 ):
     """Atualizar resultado"""
-    # Remove campos None
-    update_data = {k: v for k, v in resultado_update.dict().items() if v is not None}
+    # Campos None descartados pelo próprio serializador do Pydantic
+    update_data = resultado_update.model_dump(exclude_none=True)
 
     if not update_data:
         raise HTTPException(status_code=400, detail="Nenhum dado para atualizar")
@@ -225,3 +225,19 @@ class DistribuicaoIdadeResponse(BaseModel):
     estatisticas_gerais: Dict[str, Any] = Field(
         ..., description="Estatísticas gerais de idade"
     )
+
+
+class DashboardParticipantesResponse(BaseModel):
+    """Resposta do endpoint de painel com as estatísticas de participantes"""
+
+    por_sexo: List[Dict[str, Any]] = Field(..., description="Estatísticas por sexo")
+    por_faixa_etaria: List[Dict[str, Any]] = Field(
+        ..., description="Estatísticas por faixa etária"
+    )
+    por_cor_raca: List[Dict[str, Any]] = Field(
+        ..., description="Estatísticas por cor/raça"
+    )
+    distribuicao_idade: List[Dict[str, Any]] = Field(
+        ..., description="Faixas etárias mais representativas primeiro"
+    )
+    por_uf: List[Dict[str, Any]] = Field(..., description="Participantes por UF")
@@ -239,6 +239,16 @@ class EstatisticasPeriodoResponse(BaseModel):
     estatisticas: Dict[str, Any] = Field(..., description="Estatísticas do período")
 
 
+class DashboardResultadosResponse(BaseModel):
+    """Resposta do endpoint de painel com as estatísticas de resultados"""
+
+    medias_gerais: MediasGeraisResponse = Field(..., description="Médias por área")
+    ranking_uf: RankingUFResponse = Field(..., description="Ranking das UFs")
+    distribuicao_redacao: DistribuicaoRedacaoResponse = Field(
+        ..., description="Distribuição das notas de redação"
+    )
+
+
 class ResultadoPaginadoResponse(BaseModel):
     """Resposta padrão para listagens paginadas de resultados"""
 
@@ -5,78 +5,248 @@ Script para carregar dados do ENEM do CSV para MongoDB
 import sys
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
+from bson import ObjectId
 
 src_path = Path(__file__).parent.parent
 sys.path.append(str(src_path))
 
 from config.logs import logger  # noqa: E402
+from infra.repositories.escola_repository import EscolaRepository  # noqa: E402
+from infra.repositories.municipio_repository import MunicipioRepository  # noqa: E402
+from infra.repositories.participante_repository import (  # noqa: E402
+    ParticipanteRepository,
+)
+from infra.repositories.resultado_repository import ResultadoRepository  # noqa: E402
 from infra.settings.database import get_sync_database  # noqa: E402
+from models.base import utc_now  # noqa: E402
 from models.escola import Escola  # noqa: E402
 from models.municipio import Municipio  # noqa: E402
 from models.participante import Participante  # noqa: E402
 from models.questionario import QuestionarioSocioeconomico  # noqa: E402
-from models.resultado import Resultado  # noqa: E402
-
+from models.resultado import (  # noqa: E402
+    Resultado,
+    calcular_faixa_redacao,
+    calcular_max_nota,
+)
+
+# Quantidade de linhas lidas do CSV por vez (o parser em C rende mais em blocos grandes)
+CSV_CHUNK_SIZE = 100_000
+
+# Quantidade de documentos enviados por insert_many
+INSERT_BATCH_SIZE = 1000
+
+# Dados básicos por região para enriquecer os municípios
+INFO_POR_REGIAO = {
+    "AC": {"regiao": "Norte", "populacao_media": 45000, "pib_per_capita": 15000, "idh": 0.663},
+    "AL": {"regiao": "Nordeste", "populacao_media": 95000, "pib_per_capita": 12000, "idh": 0.631},
+    "AP": {"regiao": "Norte", "populacao_media": 50000, "pib_per_capita": 16000, "idh": 0.708},
+    "AM": {"regiao": "Norte", "populacao_media": 65000, "pib_per_capita": 18000, "idh": 0.674},
+    "BA": {"regiao": "Nordeste", "populacao_media": 35000, "pib_per_capita": 13000, "idh": 0.660},
+    "CE": {"regiao": "Nordeste", "populacao_media": 50000, "pib_per_capita": 11000, "idh": 0.682},
+    "DF": {"regiao": "Centro-Oeste", "populacao_media": 120000, "pib_per_capita": 65000, "idh": 0.824},
+    "ES": {"regiao": "Sudeste", "populacao_media": 55000, "pib_per_capita": 28000, "idh": 0.740},
+    "GO": {"regiao": "Centro-Oeste", "populacao_media": 40000, "pib_per_capita": 22000, "idh": 0.735},
+    "MA": {"regiao": "Nordeste", "populacao_media": 35000, "pib_per_capita": 10000, "idh": 0.639},
+    "MT": {"regiao": "Centro-Oeste", "populacao_media": 35000, "pib_per_capita": 35000, "idh": 0.725},
+    "MS": {"regiao": "Centro-Oeste", "populacao_media": 35000, "pib_per_capita": 28000, "idh": 0.729},
+    "MG": {"regiao": "Sudeste", "populacao_media": 45000, "pib_per_capita": 18000, "idh": 0.731},
+    "PA": {"regiao": "Norte", "populacao_media": 55000, "pib_per_capita": 14000, "idh": 0.646},
+    "PB": {"regiao": "Nordeste", "populacao_media": 18000, "pib_per_capita": 11000, "idh": 0.658},
+    "PR": {"regiao": "Sul", "populacao_media": 30000, "pib_per_capita": 24000, "idh": 0.749},
+    "PE": {"regiao": "Nordeste", "populacao_media": 50000, "pib_per_capita": 14000, "idh": 0.673},
+    "PI": {"regiao": "Nordeste", "populacao_media": 15000, "pib_per_capita": 9000, "idh": 0.646},
+    "RJ": {"regiao": "Sudeste", "populacao_media": 100000, "pib_per_capita": 32000, "idh": 0.761},
+    "RN": {"regiao": "Nordeste", "populacao_media": 20000, "pib_per_capita": 12000, "idh": 0.684},
+    "RS": {"regiao": "Sul", "populacao_media": 25000, "pib_per_capita": 28000, "idh": 0.746},
+    "RO": {"regiao": "Norte", "populacao_media": 35000, "pib_per_capita": 16000, "idh": 0.690},
+    "RR": {"regiao": "Norte", "populacao_media": 45000, "pib_per_capita": 18000, "idh": 0.707},
+    "SC": {"regiao": "Sul", "populacao_media": 25000, "pib_per_capita": 30000, "idh": 0.774},
+    "SP": {"regiao": "Sudeste", "populacao_media": 70000, "pib_per_capita": 40000, "idh": 0.783},
+    "SE": {"regiao": "Nordeste", "populacao_media": 40000, "pib_per_capita": 15000, "idh": 0.665},
+    "TO": {"regiao": "Norte", "populacao_media": 20000, "pib_per_capita": 18000, "idh": 0.699},
+}
+
+# Tipo de destino de cada coluna usada dos CSVs
+PARTICIPANTES_COLUMN_TYPES = {
+    "NU_INSCRICAO": str,
+    "NU_ANO": int,
+    "TP_FAIXA_ETARIA": int,
+    "TP_SEXO": str,
+    "TP_ESTADO_CIVIL": int,
+    "TP_COR_RACA": int,
+    "TP_NACIONALIDADE": int,
+    "TP_ST_CONCLUSAO": int,
+    "TP_ANO_CONCLUIU": int,
+    "TP_ENSINO": int,
+    "IN_TREINEIRO": bool,
+    "CO_MUNICIPIO_PROVA": int,
+    "NO_MUNICIPIO_PROVA": str,
+    "CO_UF_PROVA": int,
+    "SG_UF_PROVA": str,
+    **{f"Q{i:03d}": str for i in range(1, 24)},  # Q001 a Q023
+}
+
+RESULTADOS_COLUMN_TYPES = {
+    "NU_SEQUENCIAL": str,
+    "NU_ANO": int,
+    "CO_ESCOLA": int,
+    "CO_MUNICIPIO_ESC": int,
+    "NO_MUNICIPIO_ESC": str,
+    "CO_UF_ESC": int,
+    "SG_UF_ESC": str,
+    "TP_DEPENDENCIA_ADM_ESC": int,
+    "TP_LOCALIZACAO_ESC": int,
+    "TP_SIT_FUNC_ESC": int,
+    "CO_MUNICIPIO_PROVA": int,
+    "NO_MUNICIPIO_PROVA": str,
+    "CO_UF_PROVA": int,
+    "SG_UF_PROVA": str,
+    "TP_PRESENCA_CN": int,
+    "TP_PRESENCA_CH": int,
+    "TP_PRESENCA_LC": int,
+    "TP_PRESENCA_MT": int,
+    "CO_PROVA_CN": str,
+    "CO_PROVA_CH": str,
+    "CO_PROVA_LC": str,
+    "CO_PROVA_MT": str,
+    "NU_NOTA_CN": float,
+    "NU_NOTA_CH": float,
+    "NU_NOTA_LC": float,
+    "NU_NOTA_MT": float,
+    "TP_STATUS_REDACAO": int,
+    "NU_NOTA_COMP1": float,
+    "NU_NOTA_COMP2": float,
+    "NU_NOTA_COMP3": float,
+    "NU_NOTA_COMP4": float,
+    "NU_NOTA_COMP5": float,
+    "NU_NOTA_REDACAO": float,
+    "TX_RESPOSTAS_CN": str,
+    "TX_RESPOSTAS_CH": str,
+    "TX_RESPOSTAS_LC": str,
+    "TX_RESPOSTAS_MT": str,
+    "TX_GABARITO_CN": str,
+    "TX_GABARITO_CH": str,
+    "TX_GABARITO_LC": str,
+    "TX_GABARITO_MT": str,
+    "TP_LINGUA": int,
+}
+
+INFO_REGIAO_PADRAO = {
+    "regiao": "Não informado",
+    "populacao_media": 30000,
+    "pib_per_capita": 20000,
+    "idh": 0.700,
+}
+
+
+def document_metadata(timestamp):
+    """Campos de MongoBaseModel já preenchidos, para o model_construct não usar as default factories"""
+    # A cada chamada, model_construct inspeciona a assinatura de cada default
+    # factory que precisa executar (inspect.signature), o que custava mais que
+    # o restante da montagem do documento
+    return {"_id": ObjectId(), "created_at": timestamp, "updated_at": timestamp}
+
+
+def insert_in_batches(collection, documents, batch_size=INSERT_BATCH_SIZE):
+    """Inserir documentos em lotes e retornar os IDs na ordem de entrada"""
+    inserted_ids = []
+    for start in range(0, len(documents), batch_size):
+        result = collection.insert_many(
+            documents[start : start + batch_size], ordered=False
+        )
+        inserted_ids.extend(result.inserted_ids)
+    return inserted_ids
 
-def clean_and_convert_value(value, target_type=str):
-    """Limpar e converter valores dos CSVs"""
-    if pd.isna(value) or value == "" or value == "nan":
-        return None
 
-    try:
+def clean_and_convert_column(column, target_type=str):
+    """Limpar e converter uma coluna inteira do CSV de uma só vez (vetorizado)"""
+    if target_type is int or target_type is float:
+        numbers = pd.to_numeric(column, errors="coerce")
         if target_type is int:
-            return int(float(value))
-        elif target_type is float:
-            return float(value)
-        elif target_type is bool:
-            return str(value).upper() in ["1", "TRUE", "SIM", "S"]
-        else:
-            return str(value).strip()
-    except (ValueError, TypeError):
-        return None
-
-
-def process_participantes_data(df_participantes):
-    """Processar dados dos participantes"""
-    logger.info("Processando dados dos participantes...")
-
+            numbers = np.trunc(numbers.where(np.isfinite(numbers))).astype("Int64")
+        converted = numbers.astype(object)
+        return converted.where(numbers.notna(), None)
+
+    valid = column.notna() & (column != "") & (column != "nan")
+    text = column.astype(str)
+    if target_type is bool:
+        converted = text.str.upper().isin(["1", "TRUE", "SIM", "S"]).astype(object)
+    else:
+        converted = text.str.strip().astype(object)
+    return converted.where(valid, None)
+
+
+def convert_columns(df, column_types):
+    """Converter as colunas conhecidas do bloco, descartando as demais"""
+    return pd.DataFrame(
+        {
+            column: clean_and_convert_column(df[column], target_type)
+            for column, target_type in column_types.items()
+            if column in df.columns
+        },
+        index=df.index,
+    )
+
+
+def read_csv_in_chunks(csv_path, column_types, chunksize=CSV_CHUNK_SIZE):
+    """Ler CSV em blocos, sem materializar o arquivo inteiro em memória"""
+    # Só as colunas usadas são parseadas; as de texto já saem como str, sem a
+    # inferência de tipo por bloco (e sem perder zeros à esquerda dos códigos)
+    return pd.read_csv(
+        csv_path,
+        chunksize=chunksize,
+        usecols=lambda column: column in column_types,
+        dtype={
+            column: str
+            for column, target_type in column_types.items()
+            if target_type is str
+        },
+    )
+
+
+def process_participantes_data(df_participantes, municipios):
+    """Processar dados dos participantes, registrando os municípios de prova"""
     participantes = []
-    municipios_set = set()
+    # Um único carimbo de data por bloco, em vez de um por documento
+    agora = utc_now()
 
-    for _, row in df_participantes.iterrows():
+    df_participantes = convert_columns(df_participantes, PARTICIPANTES_COLUMN_TYPES)
+
+    for row in df_participantes.to_dict("records"):
         try:
             # Processar questionário socioeconômico
             questionario_data = {}
             for i in range(1, 24):  # Q001 a Q023
                 col_name = f"Q{i:03d}"
                 if col_name in row:
-                    questionario_data[col_name] = clean_and_convert_value(row[col_name])
+                    questionario_data[col_name] = row[col_name]
 
             questionario = (
-                QuestionarioSocioeconomico(**questionario_data)
+                QuestionarioSocioeconomico.model_construct(**questionario_data)
                 if questionario_data
                 else None
             )
 
             # Criar participante
             participante_data = {
-                "nu_inscricao": clean_and_convert_value(row["NU_INSCRICAO"]),
-                "nu_ano": clean_and_convert_value(row["NU_ANO"], int),
-                "faixa_etaria": clean_and_convert_value(row["TP_FAIXA_ETARIA"], int),
-                "sexo": clean_and_convert_value(row["TP_SEXO"]),
-                "estado_civil": clean_and_convert_value(row["TP_ESTADO_CIVIL"], int),
-                "cor_raca": clean_and_convert_value(row["TP_COR_RACA"], int),
-                "nacionalidade": clean_and_convert_value(row["TP_NACIONALIDADE"], int),
-                "st_conclusao": clean_and_convert_value(row["TP_ST_CONCLUSAO"], int),
-                "ano_concluiu": clean_and_convert_value(row["TP_ANO_CONCLUIU"], int),
-                "ensino": clean_and_convert_value(row["TP_ENSINO"], int),
-                "treineiro": clean_and_convert_value(row["IN_TREINEIRO"], bool),
-                "municipio_prova_codigo": clean_and_convert_value(
-                    row["CO_MUNICIPIO_PROVA"], int
-                ),
-                "uf_prova": clean_and_convert_value(row["SG_UF_PROVA"]),
-                "questionario": questionario.model_dump() if questionario else None,
+                "nu_inscricao": row["NU_INSCRICAO"],
+                "nu_ano": row["NU_ANO"],
+                "faixa_etaria": row["TP_FAIXA_ETARIA"],
+                "sexo": row["TP_SEXO"],
+                "estado_civil": row["TP_ESTADO_CIVIL"],
+                "cor_raca": row["TP_COR_RACA"],
+                "nacionalidade": row["TP_NACIONALIDADE"],
+                "st_conclusao": row["TP_ST_CONCLUSAO"],
+                "ano_concluiu": row["TP_ANO_CONCLUIU"],
+                "ensino": row["TP_ENSINO"],
+                "treineiro": row["IN_TREINEIRO"],
+                "municipio_prova_codigo": row["CO_MUNICIPIO_PROVA"],
+                "uf_prova": row["SG_UF_PROVA"],
+                # Serializado junto com o participante, no model_dump abaixo
+                "questionario": questionario,
+                **document_metadata(agora),
             }
 
             # Remover valores None
@@ -93,263 +263,245 @@ def process_participantes_data(df_participantes):
                     total_provas = 2  # Treineiros geralmente fazem menos provas
                 
                 participante_data["total_provas_realizadas"] = total_provas
-                
-                participante = Participante(**participante_data)
-                participantes.append(participante.model_dump(by_alias=True))
 
-                # Coletar municípios únicos
+                # Registrar município da prova e referenciá-lo pelo ID
                 if participante_data.get("municipio_prova_codigo"):
-                    municipios_set.add(
-                        (
-                            participante_data["municipio_prova_codigo"],
-                            clean_and_convert_value(row.get("NO_MUNICIPIO_PROVA", "")),
-                            clean_and_convert_value(row.get("CO_UF_PROVA"), int),
-                            participante_data["uf_prova"],
-                        )
+                    participante_data["municipio_prova_id"] = register_municipio(
+                        municipios,
+                        participante_data["municipio_prova_codigo"],
+                        row.get("NO_MUNICIPIO_PROVA"),
+                        row.get("CO_UF_PROVA"),
+                        participante_data.get("uf_prova"),
                     )
 
+                # Valores já convertidos por clean_and_convert_column: dispensa validação
+                participante = Participante.construct_trusted(participante_data)
+                participantes.append(participante.model_dump(by_alias=True))
+
         except Exception as e:
             logger.error(f"Erro ao processar participante: {e}")
             continue
 
-    return participantes, municipios_set
+    return participantes
+
 
+def count_acertos(resultado):
+    """Calcular total de acertos comparando respostas e gabaritos"""
+    acertos = 0
+    for area in ["cn", "ch", "lc", "mt"]:
+        respostas = resultado.get(f"respostas_{area}", "")
+        gabarito = resultado.get(f"gabarito_{area}", "")
+        if respostas and gabarito:
+            min_len = min(len(respostas), len(gabarito))
+            for j in range(min_len):
+                if respostas[j] == gabarito[j] and respostas[j] not in ['.', '*', ' ', '']:
+                    acertos += 1
+    return acertos
 
-def process_resultados_data(df_resultados):
-    """Processar dados dos resultados"""
-    logger.info("Processando dados dos resultados...")
 
+def process_resultados_data(df_resultados, municipios, escolas):
+    """Processar dados dos resultados, registrando escolas e seus municípios"""
     resultados = []
-    escolas_set = set()
-    municipios_escola_set = set()
+    agora = utc_now()
 
-    for _, row in df_resultados.iterrows():
+    df_resultados = convert_columns(df_resultados, RESULTADOS_COLUMN_TYPES)
+
+    for row in df_resultados.to_dict("records"):
         try:
             # Calcular média das provas objetivas
             notas = []
             for area in ["CN", "CH", "LC", "MT"]:
-                nota = clean_and_convert_value(row.get(f"NU_NOTA_{area}"), float)
+                nota = row.get(f"NU_NOTA_{area}")
                 if nota is not None:
                     notas.append(nota)
 
             media_objetivas = sum(notas) / len(notas) if notas else None
 
             resultado_data = {
-                "nu_sequencial": clean_and_convert_value(row["NU_SEQUENCIAL"]),
-                "nu_ano": clean_and_convert_value(row["NU_ANO"], int),
-                "participante_inscricao": clean_and_convert_value(
-                    row["NU_SEQUENCIAL"]
-                ),  # Usando sequencial como chave
-                "escola_codigo": clean_and_convert_value(row["CO_ESCOLA"], int),
-                "municipio_escola_codigo": clean_and_convert_value(
-                    row["CO_MUNICIPIO_ESC"], int
-                ),
-                "municipio_escola_nome": clean_and_convert_value(
-                    row["NO_MUNICIPIO_ESC"]
-                ),
-                "uf_escola_codigo": clean_and_convert_value(row["CO_UF_ESC"], int),
-                "uf_escola_sigla": clean_and_convert_value(row["SG_UF_ESC"]),
-                "dependencia_administrativa": clean_and_convert_value(
-                    row["TP_DEPENDENCIA_ADM_ESC"], int
-                ),
-                "localizacao_escola": clean_and_convert_value(
-                    row["TP_LOCALIZACAO_ESC"], int
-                ),
-                "situacao_funcionamento": clean_and_convert_value(
-                    row["TP_SIT_FUNC_ESC"], int
-                ),
-                "municipio_prova_codigo": clean_and_convert_value(
-                    row["CO_MUNICIPIO_PROVA"], int
-                ),
-                "municipio_prova_nome": clean_and_convert_value(
-                    row["NO_MUNICIPIO_PROVA"]
-                ),
-                "uf_prova_codigo": clean_and_convert_value(row["CO_UF_PROVA"], int),
-                "uf_prova_sigla": clean_and_convert_value(row["SG_UF_PROVA"]),
+                "nu_sequencial": row["NU_SEQUENCIAL"],
+                "nu_ano": row["NU_ANO"],
+                "participante_inscricao": row["NU_SEQUENCIAL"],  # Usando sequencial como chave
+                "escola_codigo": row["CO_ESCOLA"],
+                "municipio_escola_codigo": row["CO_MUNICIPIO_ESC"],
+                "municipio_escola_nome": row["NO_MUNICIPIO_ESC"],
+                "uf_escola_codigo": row["CO_UF_ESC"],
+                "uf_escola_sigla": row["SG_UF_ESC"],
+                "dependencia_administrativa": row["TP_DEPENDENCIA_ADM_ESC"],
+                "localizacao_escola": row["TP_LOCALIZACAO_ESC"],
+                "situacao_funcionamento": row["TP_SIT_FUNC_ESC"],
+                "municipio_prova_codigo": row["CO_MUNICIPIO_PROVA"],
+                "municipio_prova_nome": row["NO_MUNICIPIO_PROVA"],
+                "uf_prova_codigo": row["CO_UF_PROVA"],
+                "uf_prova_sigla": row["SG_UF_PROVA"],
                 # Presenças
-                "presenca_cn": clean_and_convert_value(row["TP_PRESENCA_CN"], int),
-                "presenca_ch": clean_and_convert_value(row["TP_PRESENCA_CH"], int),
-                "presenca_lc": clean_and_convert_value(row["TP_PRESENCA_LC"], int),
-                "presenca_mt": clean_and_convert_value(row["TP_PRESENCA_MT"], int),
+                "presenca_cn": row["TP_PRESENCA_CN"],
+                "presenca_ch": row["TP_PRESENCA_CH"],
+                "presenca_lc": row["TP_PRESENCA_LC"],
+                "presenca_mt": row["TP_PRESENCA_MT"],
                 # Códigos das provas
-                "codigo_prova_cn": clean_and_convert_value(row["CO_PROVA_CN"]),
-                "codigo_prova_ch": clean_and_convert_value(row["CO_PROVA_CH"]),
-                "codigo_prova_lc": clean_and_convert_value(row["CO_PROVA_LC"]),
-                "codigo_prova_mt": clean_and_convert_value(row["CO_PROVA_MT"]),
+                "codigo_prova_cn": row["CO_PROVA_CN"],
+                "codigo_prova_ch": row["CO_PROVA_CH"],
+                "codigo_prova_lc": row["CO_PROVA_LC"],
+                "codigo_prova_mt": row["CO_PROVA_MT"],
                 # Notas
-                "nota_cn": clean_and_convert_value(row["NU_NOTA_CN"], float),
-                "nota_ch": clean_and_convert_value(row["NU_NOTA_CH"], float),
-                "nota_lc": clean_and_convert_value(row["NU_NOTA_LC"], float),
-                "nota_mt": clean_and_convert_value(row["NU_NOTA_MT"], float),
+                "nota_cn": row["NU_NOTA_CN"],
+                "nota_ch": row["NU_NOTA_CH"],
+                "nota_lc": row["NU_NOTA_LC"],
+                "nota_mt": row["NU_NOTA_MT"],
                 # Redação
-                "status_redacao": clean_and_convert_value(
-                    row["TP_STATUS_REDACAO"], int
-                ),
-                "nota_comp1": clean_and_convert_value(row["NU_NOTA_COMP1"], float),
-                "nota_comp2": clean_and_convert_value(row["NU_NOTA_COMP2"], float),
-                "nota_comp3": clean_and_convert_value(row["NU_NOTA_COMP3"], float),
-                "nota_comp4": clean_and_convert_value(row["NU_NOTA_COMP4"], float),
-                "nota_comp5": clean_and_convert_value(row["NU_NOTA_COMP5"], float),
-                "nota_redacao": clean_and_convert_value(row["NU_NOTA_REDACAO"], float),
+                "status_redacao": row["TP_STATUS_REDACAO"],
+                "nota_comp1": row["NU_NOTA_COMP1"],
+                "nota_comp2": row["NU_NOTA_COMP2"],
+                "nota_comp3": row["NU_NOTA_COMP3"],
+                "nota_comp4": row["NU_NOTA_COMP4"],
+                "nota_comp5": row["NU_NOTA_COMP5"],
+                "nota_redacao": row["NU_NOTA_REDACAO"],
                 # Campos calculados
                 "media_provas_objetivas": media_objetivas,
+                "faixa_redacao": calcular_faixa_redacao(row["NU_NOTA_REDACAO"]),
+                "max_nota": calcular_max_nota(
+                    row[f"NU_NOTA_{area}"] for area in ("CN", "CH", "LC", "MT", "REDACAO")
+                ),
                 # Respostas e gabaritos
-                "respostas_cn": clean_and_convert_value(row["TX_RESPOSTAS_CN"]),
-                "respostas_ch": clean_and_convert_value(row["TX_RESPOSTAS_CH"]),
-                "respostas_lc": clean_and_convert_value(row["TX_RESPOSTAS_LC"]),
-                "respostas_mt": clean_and_convert_value(row["TX_RESPOSTAS_MT"]),
-                "gabarito_cn": clean_and_convert_value(row["TX_GABARITO_CN"]),
-                "gabarito_ch": clean_and_convert_value(row["TX_GABARITO_CH"]),
-                "gabarito_lc": clean_and_convert_value(row["TX_GABARITO_LC"]),
-                "gabarito_mt": clean_and_convert_value(row["TX_GABARITO_MT"]),
-                "lingua_estrangeira": clean_and_convert_value(row["TP_LINGUA"], int),
+                "respostas_cn": row["TX_RESPOSTAS_CN"],
+                "respostas_ch": row["TX_RESPOSTAS_CH"],
+                "respostas_lc": row["TX_RESPOSTAS_LC"],
+                "respostas_mt": row["TX_RESPOSTAS_MT"],
+                "gabarito_cn": row["TX_GABARITO_CN"],
+                "gabarito_ch": row["TX_GABARITO_CH"],
+                "gabarito_lc": row["TX_GABARITO_LC"],
+                "gabarito_mt": row["TX_GABARITO_MT"],
+                "lingua_estrangeira": row["TP_LINGUA"],
+                **document_metadata(agora),
             }
 
             # Remover valores None
             resultado_data = {k: v for k, v in resultado_data.items() if v is not None}
 
             if resultado_data.get("nu_sequencial"):
-                resultado = Resultado(**resultado_data)
-                resultados.append(resultado.model_dump(by_alias=True))
+                # Registrar município da escola e a própria escola
+                municipio_escola_codigo = resultado_data.get("municipio_escola_codigo")
+                municipio_escola_id = None
+                if municipio_escola_codigo:
+                    municipio_escola_id = register_municipio(
+                        municipios,
+                        municipio_escola_codigo,
+                        resultado_data.get("municipio_escola_nome"),
+                        resultado_data.get("uf_escola_codigo"),
+                        resultado_data.get("uf_escola_sigla"),
+                    )
 
-                # Coletar escolas únicas
-                if resultado_data.get("escola_codigo"):
-                    escolas_set.add(
-                        (
-                            resultado_data["escola_codigo"],
-                            resultado_data.get("municipio_escola_codigo"),
+                escola_codigo = resultado_data.get("escola_codigo")
+                if escola_codigo:
+                    if escola_codigo not in escolas:
+                        escolas[escola_codigo] = build_escola(
+                            escola_codigo,
+                            municipio_escola_codigo,
                             resultado_data.get("uf_escola_codigo"),
                             resultado_data.get("uf_escola_sigla"),
                             resultado_data.get("dependencia_administrativa"),
                             resultado_data.get("localizacao_escola"),
                             resultado_data.get("situacao_funcionamento"),
+                            municipio_escola_id,
                         )
-                    )
+                    resultado_data["escola_id"] = escolas[escola_codigo]["_id"]
 
-                # Coletar municípios das escolas
-                if resultado_data.get("municipio_escola_codigo"):
-                    municipios_escola_set.add(
-                        (
-                            resultado_data["municipio_escola_codigo"],
-                            resultado_data.get("municipio_escola_nome"),
-                            resultado_data.get("uf_escola_codigo"),
-                            resultado_data.get("uf_escola_sigla"),
-                        )
-                    )
+                # Como os CSVs de amostra podem não ter relacionamento direto entre
+                # NU_INSCRICAO e NU_SEQUENCIAL, participante_id fica como null
+                # e os campos de código são usados para relacionamentos
+                resultado_data["total_acertos"] = count_acertos(resultado_data)
+
+                resultado = Resultado.construct_trusted(resultado_data)
+                resultados.append(resultado.model_dump(by_alias=True))
 
         except Exception as e:
             logger.error(f"Erro ao processar resultado: {e}")
             continue
 
-    return resultados, escolas_set, municipios_escola_set
-
-
-def create_municipios_from_sets(municipios_set, municipios_escola_set):
-    """Criar municípios únicos a partir dos conjuntos coletados"""
-    all_municipios = {}
-
-    # Dados básicos por região para enriquecer os municípios
-    info_por_regiao = {
-        "AC": {"regiao": "Norte", "populacao_media": 45000, "pib_per_capita": 15000, "idh": 0.663},
-        "AL": {"regiao": "Nordeste", "populacao_media": 95000, "pib_per_capita": 12000, "idh": 0.631},
-        "AP": {"regiao": "Norte", "populacao_media": 50000, "pib_per_capita": 16000, "idh": 0.708},
-        "AM": {"regiao": "Norte", "populacao_media": 65000, "pib_per_capita": 18000, "idh": 0.674},
-        "BA": {"regiao": "Nordeste", "populacao_media": 35000, "pib_per_capita": 13000, "idh": 0.660},
-        "CE": {"regiao": "Nordeste", "populacao_media": 50000, "pib_per_capita": 11000, "idh": 0.682},
-        "DF": {"regiao": "Centro-Oeste", "populacao_media": 120000, "pib_per_capita": 65000, "idh": 0.824},
-        "ES": {"regiao": "Sudeste", "populacao_media": 55000, "pib_per_capita": 28000, "idh": 0.740},
-        "GO": {"regiao": "Centro-Oeste", "populacao_media": 40000, "pib_per_capita": 22000, "idh": 0.735},
-        "MA": {"regiao": "Nordeste", "populacao_media": 35000, "pib_per_capita": 10000, "idh": 0.639},
-        "MT": {"regiao": "Centro-Oeste", "populacao_media": 35000, "pib_per_capita": 35000, "idh": 0.725},
-        "MS": {"regiao": "Centro-Oeste", "populacao_media": 35000, "pib_per_capita": 28000, "idh": 0.729},
-        "MG": {"regiao": "Sudeste", "populacao_media": 45000, "pib_per_capita": 18000, "idh": 0.731},
-        "PA": {"regiao": "Norte", "populacao_media": 55000, "pib_per_capita": 14000, "idh": 0.646},
-        "PB": {"regiao": "Nordeste", "populacao_media": 18000, "pib_per_capita": 11000, "idh": 0.658},
-        "PR": {"regiao": "Sul", "populacao_media": 30000, "pib_per_capita": 24000, "idh": 0.749},
-        "PE": {"regiao": "Nordeste", "populacao_media": 50000, "pib_per_capita": 14000, "idh": 0.673},
-        "PI": {"regiao": "Nordeste", "populacao_media": 15000, "pib_per_capita": 9000, "idh": 0.646},
-        "RJ": {"regiao": "Sudeste", "populacao_media": 100000, "pib_per_capita": 32000, "idh": 0.761},
-        "RN": {"regiao": "Nordeste", "populacao_media": 20000, "pib_per_capita": 12000, "idh": 0.684},
-        "RS": {"regiao": "Sul", "populacao_media": 25000, "pib_per_capita": 28000, "idh": 0.746},
-        "RO": {"regiao": "Norte", "populacao_media": 35000, "pib_per_capita": 16000, "idh": 0.690},
-        "RR": {"regiao": "Norte", "populacao_media": 45000, "pib_per_capita": 18000, "idh": 0.707},
-        "SC": {"regiao": "Sul", "populacao_media": 25000, "pib_per_capita": 30000, "idh": 0.774},
-        "SP": {"regiao": "Sudeste", "populacao_media": 70000, "pib_per_capita": 40000, "idh": 0.783},
-        "SE": {"regiao": "Nordeste", "populacao_media": 40000, "pib_per_capita": 15000, "idh": 0.665},
-        "TO": {"regiao": "Norte", "populacao_media": 20000, "pib_per_capita": 18000, "idh": 0.699},
-    }
+    return resultados
 
-    # Processar municípios das provas
-    for codigo, nome, uf_codigo, uf_sigla in municipios_set:
-        if codigo and codigo not in all_municipios:
-            info_uf = info_por_regiao.get(uf_sigla, {"regiao": "Não informado", "populacao_media": 30000, "pib_per_capita": 20000, "idh": 0.700})
-            
-            municipio_data = {
-                "codigo": codigo,
-                "nome": nome or f"Município {codigo}",
-                "uf_codigo": uf_codigo or 0,
-                "uf_sigla": uf_sigla or "BR",
-                "regiao": info_uf["regiao"],
-                "populacao": int(info_uf["populacao_media"] * (0.5 + (codigo % 100) / 100)),  # Variação baseada no código
-                "pib_per_capita": round(info_uf["pib_per_capita"] * (0.7 + (codigo % 50) / 100), 2),
-                "idh": round(info_uf["idh"] + ((codigo % 20) - 10) * 0.001, 3),  # Pequena variação
-            }
-            municipio = Municipio(**municipio_data)
-            all_municipios[codigo] = municipio.model_dump(by_alias=True)
-
-    # Processar municípios das escolas
-    for codigo, nome, uf_codigo, uf_sigla in municipios_escola_set:
-        if codigo and codigo not in all_municipios:
-            info_uf = info_por_regiao.get(uf_sigla, {"regiao": "Não informado", "populacao_media": 30000, "pib_per_capita": 20000, "idh": 0.700})
-            
-            municipio_data = {
-                "codigo": codigo,
-                "nome": nome or f"Município {codigo}",
-                "uf_codigo": uf_codigo or 0,
-                "uf_sigla": uf_sigla or "BR",
-                "regiao": info_uf["regiao"],
-                "populacao": int(info_uf["populacao_media"] * (0.5 + (codigo % 100) / 100)),
-                "pib_per_capita": round(info_uf["pib_per_capita"] * (0.7 + (codigo % 50) / 100), 2),
-                "idh": round(info_uf["idh"] + ((codigo % 20) - 10) * 0.001, 3),
-            }
-            municipio = Municipio(**municipio_data)
-            all_municipios[codigo] = municipio.model_dump(by_alias=True)
-
-    return list(all_municipios.values())
-
-
-def create_escolas_from_set(escolas_set):
-    """Criar escolas únicas a partir do conjunto coletado"""
-    escolas = []
-
-    for (
-        codigo,
-        municipio_codigo,
-        uf_codigo,
-        uf_sigla,
-        dep_adm,
-        localizacao,
-        sit_func,
-    ) in escolas_set:
-        if codigo:
-            try:
-                escola_data = {
-                    "codigo": codigo,
-                    "nome": f"Escola {codigo}",
-                    "municipio_codigo": municipio_codigo or 0,
-                    "uf_codigo": uf_codigo or 0,
-                    "uf_sigla": uf_sigla or "BR",
-                    "dependencia_administrativa": dep_adm or 0,
-                    "localizacao": localizacao or 0,
-                    "situacao_funcionamento": sit_func or 0,
-                }
-                escola = Escola(**escola_data)
-                escolas.append(escola.model_dump(by_alias=True))
-            except Exception as e:
-                logger.error(f"Erro ao criar escola {codigo}: {e}")
-                continue
-
-    return escolas
+
+def load_participantes_csv(csv_path, collection, municipios):
+    """Ler o CSV de participantes em blocos, inserindo cada bloco no MongoDB"""
+    logger.info("Processando e inserindo participantes...")
+
+    total_linhas = 0
+    total_inseridos = 0
+
+    for chunk in read_csv_in_chunks(csv_path, PARTICIPANTES_COLUMN_TYPES):
+        total_linhas += len(chunk)
+        participantes = process_participantes_data(chunk, municipios)
+        total_inseridos += len(insert_in_batches(collection, participantes))
+
+    logger.info(f"Participantes lidos: {total_linhas}, inseridos: {total_inseridos}")
+    return total_inseridos
+
+
+def load_resultados_csv(csv_path, collection, municipios, escolas):
+    """Ler o CSV de resultados em blocos, inserindo cada bloco no MongoDB"""
+    logger.info("Processando e inserindo resultados...")
+
+    total_linhas = 0
+    total_inseridos = 0
+
+    for chunk in read_csv_in_chunks(csv_path, RESULTADOS_COLUMN_TYPES):
+        total_linhas += len(chunk)
+        resultados = process_resultados_data(chunk, municipios, escolas)
+        total_inseridos += len(insert_in_batches(collection, resultados))
+
+    logger.info(f"Resultados lidos: {total_linhas}, inseridos: {total_inseridos}")
+    return total_inseridos
+
+
+def build_municipio(codigo, nome, uf_codigo, uf_sigla):
+    """Montar o documento de um município a partir dos dados do CSV"""
+    info_uf = INFO_POR_REGIAO.get(uf_sigla, INFO_REGIAO_PADRAO)
+
+    municipio_data = {
+        "codigo": codigo,
+        "nome": nome or f"Município {codigo}",
+        "uf_codigo": uf_codigo or 0,
+        "uf_sigla": uf_sigla or "BR",
+        "regiao": info_uf["regiao"],
+        "populacao": int(info_uf["populacao_media"] * (0.5 + (codigo % 100) / 100)),  # Variação baseada no código
+        "pib_per_capita": round(info_uf["pib_per_capita"] * (0.7 + (codigo % 50) / 100), 2),
+        "idh": round(info_uf["idh"] + ((codigo % 20) - 10) * 0.001, 3),  # Pequena variação
+        **document_metadata(utc_now()),
+    }
+    return Municipio.construct_trusted(municipio_data).model_dump(by_alias=True)
+
+
+def register_municipio(municipios, codigo, nome, uf_codigo, uf_sigla):
+    """Registrar o município na primeira vez que aparece e retornar seu ID"""
+    if codigo not in municipios:
+        municipios[codigo] = build_municipio(codigo, nome, uf_codigo, uf_sigla)
+    return municipios[codigo]["_id"]
+
+
+def build_escola(
+    codigo,
+    municipio_codigo,
+    uf_codigo,
+    uf_sigla,
+    dep_adm,
+    localizacao,
+    sit_func,
+    municipio_id=None,
+):
+    """Montar o documento de uma escola a partir dos dados do CSV"""
+    escola_data = {
+        "codigo": codigo,
+        "nome": f"Escola {codigo}",
+        "municipio_codigo": municipio_codigo or 0,
+        "municipio_id": municipio_id,
+        "uf_codigo": uf_codigo or 0,
+        "uf_sigla": uf_sigla or "BR",
+        "dependencia_administrativa": dep_adm or 0,
+        "localizacao": localizacao or 0,
+        "situacao_funcionamento": sit_func or 0,
+        **document_metadata(utc_now()),
+    }
+    return Escola.construct_trusted(escola_data).model_dump(by_alias=True)
 
 
 def load_data_to_mongodb():
@@ -360,119 +512,46 @@ def load_data_to_mongodb():
 
         data_path = Path("data")
 
-        logger.info("Carregando arquivos CSV...")
-        df_participantes = pd.read_csv(data_path / "amostra_participantes.csv")
-        df_resultados = pd.read_csv(data_path / "amostra_resultados.csv")
-
-        logger.info(f"Participantes carregados: {len(df_participantes)}")
-        logger.info(f"Resultados carregados: {len(df_resultados)}")
+        # Remover as coleções (e seus índices) para recriá-las do zero
+        logger.info("Limpando coleções existentes...")
+        db.municipios.drop()
+        db.escolas.drop()
+        db.participantes.drop()
+        db.resultados.drop()
+        db.escola_stats.drop()
+        db.resultados_uf_stats.drop()
+        db.resultados_distribuicao_redacao.drop()
+        db.resultados_medias_area.drop()
+        db.participantes_summary.drop()
+
+        # Participantes e resultados vão para o MongoDB bloco a bloco. Municípios
+        # e escolas recebem o ID ao serem vistos pela primeira vez, então as
+        # referências já saem prontas e eles são inseridos ao final.
+        municipios = {}
+        escolas = {}
 
-        # Processar dados
-        participantes, municipios_prova_set = process_participantes_data(
-            df_participantes
+        logger.info("Carregando arquivos CSV...")
+        load_participantes_csv(
+            data_path / "amostra_participantes.csv", db.participantes, municipios
         )
-        resultados, escolas_set, municipios_escola_set = process_resultados_data(
-            df_resultados
+        load_resultados_csv(
+            data_path / "amostra_resultados.csv", db.resultados, municipios, escolas
         )
 
-        # Criar municípios únicos
-        municipios = create_municipios_from_sets(
-            municipios_prova_set, municipios_escola_set
-        )
-
-        # Criar escolas únicas
-        escolas = create_escolas_from_set(escolas_set)
-
-        # Limpar coleções existentes
-        logger.info("Limpando coleções existentes...")
-        db.municipios.delete_many({})
-        db.escolas.delete_many({})
-        db.participantes.delete_many({})
-        db.resultados.delete_many({})
-
-        # Inserir municípios primeiro para obter IDs
-        municipio_id_map = {}
         if municipios:
             logger.info(f"Inserindo {len(municipios)} municípios...")
-            municipios_result = db.municipios.insert_many(municipios)
-            
-            # Criar mapeamento código -> ObjectId
-            for i, inserted_id in enumerate(municipios_result.inserted_ids):
-                codigo = municipios[i]["codigo"]
-                municipio_id_map[codigo] = inserted_id
-
-        # Inserir escolas e fazer referência aos municípios
-        escola_id_map = {}
+            insert_in_batches(db.municipios, list(municipios.values()))
+
         if escolas:
             logger.info(f"Inserindo {len(escolas)} escolas...")
-            # Atualizar referências aos municípios nas escolas
-            for escola in escolas:
-                municipio_codigo = escola["municipio_codigo"]
-                if municipio_codigo in municipio_id_map:
-                    escola["municipio_id"] = municipio_id_map[municipio_codigo]
-            
-            escolas_result = db.escolas.insert_many(escolas)
-            
-            # Criar mapeamento código -> ObjectId
-            for i, inserted_id in enumerate(escolas_result.inserted_ids):
-                codigo = escolas[i]["codigo"]
-                escola_id_map[codigo] = inserted_id
-
-        # Inserir participantes e fazer referência aos municípios
-        participante_sequencial_map = {}
-        if participantes:
-            logger.info(f"Inserindo {len(participantes)} participantes...")
-            # Atualizar referências aos municípios nos participantes
-            for participante in participantes:
-                municipio_codigo = participante.get("municipio_prova_codigo")
-                if municipio_codigo and municipio_codigo in municipio_id_map:
-                    participante["municipio_prova_id"] = municipio_id_map[municipio_codigo]
-            
-            participantes_result = db.participantes.insert_many(participantes)
-            
-            # Criar mapeamento nu_inscricao -> ObjectId (usamos nu_inscricao como chave)
-            for i, inserted_id in enumerate(participantes_result.inserted_ids):
-                nu_inscricao = participantes[i]["nu_inscricao"]
-                participante_sequencial_map[nu_inscricao] = inserted_id
-
-        # Inserir resultados com todas as referências
-        if resultados:
-            logger.info(f"Inserindo {len(resultados)} resultados...")
-            # Atualizar referências nos resultados
-            for resultado in resultados:
-                # Como os CSVs de amostra podem não ter relacionamento direto entre 
-                # NU_INSCRICAO e NU_SEQUENCIAL, vamos deixar participante_id como null
-                # e usar os campos de código para relacionamentos
-                
-                # Referência à escola
-                escola_codigo = resultado.get("escola_codigo")
-                if escola_codigo and escola_codigo in escola_id_map:
-                    resultado["escola_id"] = escola_id_map[escola_codigo]
-                
-                # Calcular total de acertos
-                acertos = 0
-                for area in ["CN", "CH", "LC", "MT"]:
-                    respostas = resultado.get(f"respostas_{area.lower()}", "")
-                    gabarito = resultado.get(f"gabarito_{area.lower()}", "")
-                    if respostas and gabarito:
-                        min_len = min(len(respostas), len(gabarito))
-                        for j in range(min_len):
-                            if respostas[j] == gabarito[j] and respostas[j] not in ['.', '*', ' ', '']:
-                                acertos += 1
-                resultado["total_acertos"] = acertos
-            
-            db.resultados.insert_many(resultados)
+            insert_in_batches(db.escolas, list(escolas.values()))
 
         # Criar índices para melhor performance
         logger.info("Criando índices...")
-        db.municipios.create_index("codigo")
-        db.escolas.create_index("codigo")
-        db.escolas.create_index("municipio_codigo")
-        db.participantes.create_index("nu_inscricao")
-        db.participantes.create_index("municipio_prova_codigo")
-        db.resultados.create_index("participante_inscricao")
-        db.resultados.create_index("escola_codigo")
-        db.resultados.create_index("nu_ano")
+        db.municipios.create_indexes(MunicipioRepository.indexes)
+        db.escolas.create_indexes(EscolaRepository.indexes)
+        db.participantes.create_indexes(ParticipanteRepository.indexes)
+        db.resultados.create_indexes(ResultadoRepository.indexes)
 
         logger.info("Carregamento concluído com sucesso!")
 
@@ -44,7 +44,7 @@ class EscolaService:
             created_escola = await self.escola_repository.create(escola)
 
             logger.info(f"Escola criada com sucesso: {codigo_escola}")
-            return created_escola.dict()
+            return created_escola.model_dump(by_alias=False)
 
         except Exception as e:
             logger.error(f"Erro ao criar escola: {str(e)}")
@@ -159,10 +159,9 @@ class EscolaService:
             if situacao_funcionamento:
                 filter_dict["situacao_funcionamento"] = situacao_funcionamento
 
-            escolas = await self.escola_repository.find_all(
+            escolas, total = await self.escola_repository.find_page(
                 skip=skip, limit=limit, filter_dict=filter_dict, sort_by="nome"
             )
-            total = await self.escola_repository.count(filter_dict)
 
             logger.info(
                 f"Encontradas {total} escolas, retornando {len(escolas)} registros"
@@ -291,7 +290,7 @@ class EscolaService:
         """
         try:
             logger.info(f"Gerando ranking de escolas por desempenho (top {limit})")
-            ranking = await self.escola_repository.get_ranking_por_desempenho(limit)
+            ranking = await self.escola_repository.get_ranking_por_desempenho_cached(limit)
 
             logger.info(f"Ranking gerado com {len(ranking)} escolas")
             return ranking
@@ -322,7 +321,7 @@ class EscolaService:
                 logger.warning(f"Escola não encontrada para código: {codigo}")
                 return {}
 
-            stats = await self.escola_repository.get_estatisticas_escola(codigo)
+            stats = await self.escola_repository.get_estatisticas_escola_cached(codigo)
             resultado = {
                 "escola": escola,
                 "estatisticas": stats,
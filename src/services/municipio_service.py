@@ -1,5 +1,4 @@
 import traceback
-from datetime import datetime
 from typing import Any, Dict, List, Optional
 
 from config.logs import logger
@@ -46,7 +45,7 @@ class MunicipioService:
             logger.info(
                 f"Município criado com sucesso - ID: {created_municipio.id}, Nome: {nome_municipio}"
             )
-            return created_municipio.dict()
+            return created_municipio.model_dump(by_alias=False)
 
         except Exception as e:
             logger.error(f"Erro ao criar município: {str(e)}")
@@ -144,10 +143,9 @@ class MunicipioService:
             if regiao:
                 filter_dict["regiao"] = regiao
 
-            municipios = await self.municipio_repository.find_all(
+            municipios, total = await self.municipio_repository.find_page(
                 skip=skip, limit=limit, filter_dict=filter_dict, sort_by="nome"
             )
-            total = await self.municipio_repository.count(filter_dict)
 
             logger.info(
                 f"Encontrados {total} municípios, retornando {len(municipios)} registros"
@@ -184,7 +182,6 @@ class MunicipioService:
         """
         try:
             logger.info(f"Atualizando município ID: {id}")
-            update_data["updated_at"] = datetime.now()
             result = await self.municipio_repository.update_by_id(id, update_data)
 
             if result:
@@ -47,7 +47,7 @@ class ParticipanteService:
             )
 
             logger.info(f"Participante criado com sucesso: {nu_inscricao}")
-            return created_participante.dict()
+            return created_participante.model_dump(by_alias=False)
 
         except Exception as e:
             logger.error(f"Erro ao criar participante: {str(e)}")
@@ -177,10 +177,9 @@ class ParticipanteService:
                     idade_filter["$lte"] = idade_max
                 filter_dict["nu_idade"] = idade_filter
 
-            participantes = await self.participante_repository.find_all(
+            participantes, total = await self.participante_repository.find_page(
                 skip=skip, limit=limit, filter_dict=filter_dict, sort_by="nu_inscricao"
             )
-            total = await self.participante_repository.count(filter_dict)
 
             logger.info(
                 f"Encontrados {total} participantes, retornando {len(participantes)} registros"
@@ -288,6 +287,31 @@ class ParticipanteService:
             logger.error(traceback.format_exc())
             raise
 
+    async def obter_dashboard(self) -> Dict[str, Any]:
+        """
+        Obter as estatísticas do painel de participantes.
+
+        Args:
+            None
+
+        Returns:
+            Dict[str, Any]: Distribuições por sexo, faixa etária, cor/raça, idade e UF
+
+        Exceptions:
+            Exception: Erro durante cálculo das estatísticas
+        """
+        try:
+            logger.info("Calculando estatísticas do painel de participantes")
+            dashboard = await self.participante_repository.get_dashboard()
+
+            logger.info("Estatísticas do painel calculadas com sucesso")
+            return dashboard
+
+        except Exception as e:
+            logger.error(f"Erro ao calcular estatísticas do painel: {str(e)}")
+            logger.error(traceback.format_exc())
+            raise
+
     async def obter_participantes_por_escola(
         self, escola_codigo: int
     ) -> List[Dict[str, Any]]:
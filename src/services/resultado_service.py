@@ -1,10 +1,36 @@
+import asyncio
 import traceback
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from config.logs import logger
 from infra.repositories.resultado_repository import ResultadoRepository
-from models.resultado import Resultado
+from infra.responses import dumps
+from models.resultado import (
+    NOTAS_AREAS,
+    Resultado,
+    calcular_faixa_redacao,
+    calcular_max_nota,
+)
+
+
+# Campos que podem ser pedidos na projeção: os nomes gravados no MongoDB
+CAMPOS_RESULTADO = frozenset(
+    campo.alias or nome for nome, campo in Resultado.model_fields.items()
+)
+
+
+def validar_campos(campos: Optional[List[str]]) -> None:
+    """Rejeitar campos fora do modelo (inclusive caminhos com "." ou "$")"""
+    invalidos = sorted(set(campos or []) - CAMPOS_RESULTADO)
+    if invalidos:
+        raise ValueError(f"Campos inválidos: {', '.join(invalidos)}")
+
+
+def _projecao(campos: Optional[List[str]]) -> Optional[Dict[str, int]]:
+    """Montar a projeção do MongoDB a partir dos campos pedidos"""
+    validar_campos(campos)
+    return {campo: 1 for campo in campos} if campos else None
 
 
 class ResultadoService:
@@ -56,11 +82,18 @@ class ResultadoService:
                     f"Média calculada: {resultado_data['media_provas_objetivas']}"
                 )
 
+            resultado_data["faixa_redacao"] = calcular_faixa_redacao(
+                resultado_data.get("nota_redacao")
+            )
+            resultado_data["max_nota"] = calcular_max_nota(
+                resultado_data.get(campo) for campo in NOTAS_AREAS
+            )
+
             resultado = Resultado(**resultado_data)
             created_resultado = await self.resultado_repository.create(resultado)
 
-            logger.info(f"Resultado criado com sucesso: {created_resultado.get('_id')}")
-            return created_resultado.dict()
+            logger.info(f"Resultado criado com sucesso: {created_resultado.id}")
+            return created_resultado.model_dump(by_alias=False)
 
         except Exception as e:
             logger.error(f"Erro ao criar resultado: {str(e)}")
@@ -139,6 +172,51 @@ class ResultadoService:
             logger.error(traceback.format_exc())
             raise
 
+    async def stream_resultados_por_escola(
+        self, escola_codigo: int, campos: Optional[List[str]] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Transmitir os resultados de uma escola como linhas NDJSON.
+
+        Args:
+            escola_codigo (int): Código da escola
+            campos (Optional[List[str]]): Campos a transmitir (todos, se omitido)
+
+        Returns:
+            AsyncIterator[bytes]: Uma linha JSON por resultado
+
+        Exceptions:
+            Exception: Erro durante leitura dos resultados
+        """
+        logger.info(f"Transmitindo resultados da escola: {escola_codigo}")
+        async for resultado in self.resultado_repository.find_by_escola(
+            escola_codigo, _projecao(campos)
+        ):
+            yield dumps(resultado) + b"\n"
+
+    async def stream_resultados_por_escola_bson(
+        self, escola_codigo: int, campos: Optional[List[str]] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Transmitir os resultados de uma escola como BSON bruto, sem conversão.
+
+        Args:
+            escola_codigo (int): Código da escola
+            campos (Optional[List[str]]): Campos a transmitir (todos, se omitido)
+
+        Returns:
+            AsyncIterator[bytes]: Documentos BSON concatenados, um por resultado
+
+        Exceptions:
+            Exception: Erro durante leitura dos resultados
+        """
+        logger.info(f"Transmitindo resultados da escola em BSON: {escola_codigo}")
+        # Cada lote do servidor já é uma sequência de documentos BSON: repassado inteiro
+        async for lote in self.resultado_repository.iter_raw_batches(
+            {"escola_codigo": escola_codigo}, _projecao(campos)
+        ):
+            yield lote
+
     async def listar_resultados(
         self,
         skip: int = 0,
@@ -146,6 +224,7 @@ class ResultadoService:
         ano: Optional[int] = None,
         escola_codigo: Optional[int] = None,
         uf_prova_sigla: Optional[str] = None,
+        campos: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """
         Listar resultados com filtros opcionais.
@@ -156,6 +235,7 @@ class ResultadoService:
             ano (Optional[int]): Filtrar por ano. Default: None
             escola_codigo (Optional[int]): Filtrar por código da escola. Default: None
             uf_prova_sigla (Optional[str]): Filtrar por sigla da UF da prova. Default: None
+            campos (Optional[List[str]]): Campos retornados em cada item (todos, se None). Default: None
 
         Returns:
             Dict[str, Any]: Dados paginados dos resultados com metadados
@@ -176,10 +256,13 @@ class ResultadoService:
             if uf_prova_sigla:
                 filter_dict["uf_prova_sigla"] = uf_prova_sigla
 
-            resultados = await self.resultado_repository.find_all(
-                skip=skip, limit=limit, filter_dict=filter_dict, sort_by="nu_sequencial"
+            resultados, total = await self.resultado_repository.find_page(
+                skip=skip,
+                limit=limit,
+                filter_dict=filter_dict,
+                sort_by="nu_sequencial",
+                projection=_projecao(campos),
             )
-            total = await self.resultado_repository.count(filter_dict)
 
             logger.info(
                 f"Encontrados {total} resultados, retornando {len(resultados)} registros"
@@ -248,6 +331,31 @@ class ResultadoService:
             logger.error(traceback.format_exc())
             raise
 
+    async def obter_dashboard(self) -> Dict[str, Any]:
+        """
+        Obter as estatísticas do painel de resultados.
+
+        Args:
+            None
+
+        Returns:
+            Dict[str, Any]: Médias por área, ranking das UFs e distribuição da redação
+
+        Exceptions:
+            Exception: Erro durante cálculo das estatísticas
+        """
+        try:
+            logger.info("Calculando estatísticas do painel de resultados")
+            dashboard = await self.resultado_repository.get_dashboard()
+
+            logger.info("Estatísticas do painel calculadas com sucesso")
+            return dashboard
+
+        except Exception as e:
+            logger.error(f"Erro ao calcular estatísticas do painel: {str(e)}")
+            logger.error(traceback.format_exc())
+            raise
+
     async def obter_participantes_destaque(
         self, nota_corte: float = 700.0, skip: int = 0, limit: int = 10
     ) -> Dict[str, Any]:
@@ -270,14 +378,13 @@ class ResultadoService:
                 f"Buscando participantes com notas acima de {nota_corte} - skip: {skip}, limit: {limit}"
             )
 
-            # Obter participantes com paginação
-            participantes = await self.resultado_repository.get_notas_acima_media(
-                nota_corte, skip=skip, limit=limit
+            # Página e total de participantes que atendem ao critério em uma só consulta
+            participantes, total = (
+                await self.resultado_repository.get_notas_acima_media_page(
+                    nota_corte, skip=skip, limit=limit
+                )
             )
 
-            # Contar total de participantes que atendem ao critério
-            total = await self.resultado_repository.count_notas_acima_media(nota_corte)
-
             logger.info(
                 f"Encontrados {total} participantes em destaque no total, retornando {len(participantes)} registros"
             )
@@ -353,8 +460,11 @@ class ResultadoService:
             if data_inicio and data_fim:
                 filter_dict["created_at"] = {"$gte": data_inicio, "$lte": data_fim}
 
-            total = await self.resultado_repository.count(filter_dict)
-            medias = await self.resultado_repository.get_media_notas_por_area()
+            # Contagem pelo índice de created_at; médias gerais vêm do cache/visão
+            total, medias = await asyncio.gather(
+                self.resultado_repository.count(filter_dict),
+                self.resultado_repository.get_media_notas_por_area(),
+            )
 
             resultado = {
                 "total_resultados": total,
@@ -391,6 +501,11 @@ class ResultadoService:
         """
         try:
             logger.info(f"Atualizando resultado: {resultado_id}")
+            if "nota_redacao" in update_data:
+                update_data["faixa_redacao"] = calcular_faixa_redacao(
+                    update_data["nota_redacao"]
+                )
+
             updated = await self.resultado_repository.update_by_id(
                 resultado_id, update_data
             )